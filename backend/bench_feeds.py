@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark feed page loading: full ORM prompt rows vs the slim list rows used by main.py
+
+Reports, per page, the bytes of row data Postgres returns and the time to
+fetch and serialize the page. Run against a database with imported prompts:
+
+    python bench_feeds.py --pages 200 --limit 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.append(str(backend_dir))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased, selectinload
+
+from database import AsyncSessionLocal, Prompt
+from main import LIST_COLUMNS, METRIC_FIELDS, METRIC_TOTALS, select_list_rows, serialize_prompt
+
+def full_page_query(limit: int):
+    """The previous feed query: whole Prompt entities (prompt_text included) plus metric totals"""
+    page = select(Prompt).with_only_columns(
+        *[column for column in Prompt.__table__.columns if column.key != "search_vector"]
+    ).order_by(Prompt.created_at.desc(), Prompt.id.desc()).limit(limit).cte("page")
+    page_prompt = aliased(Prompt, page)
+    totals = METRIC_TOTALS
+    return select(
+        page_prompt,
+        *[func.coalesce(totals.c[field], 0) for field in METRIC_FIELDS]
+    ).outerjoin(
+        totals, totals.c.prompt_id == page_prompt.id
+    ).options(selectinload(page_prompt.user)).order_by(page_prompt.created_at.desc(), page_prompt.id.desc())
+
+def serialize_full(prompt: Prompt, metrics: dict) -> dict:
+    return {
+        "id": prompt.id,
+        "title": prompt.title,
+        "model": prompt.model,
+        "output_type": prompt.output_type,
+        "tags": prompt.tags,
+        "source_url": prompt.source_url,
+        "attribution": prompt.attribution,
+        "image_url": prompt.image_url,
+        "created_at": prompt.created_at.isoformat(),
+        "author": prompt.user.username if prompt.user else "Admin",
+        "metrics": metrics
+    }
+
+def slim_page_query(limit: int):
+    page = select(*LIST_COLUMNS).order_by(Prompt.created_at.desc(), Prompt.id.desc()).limit(limit).cte("page")
+    return select_list_rows(page).order_by(page.c.created_at.desc(), page.c.id.desc())
+
+async def page_bytes(db, stmt) -> int:
+    """Total on-disk size of the column values a query returns (what crosses the wire, roughly)"""
+    rows = stmt.subquery("result")
+    size = select(func.coalesce(func.sum(func.pg_column_size(rows.table_valued())), 0))
+    return int((await db.execute(size)).scalar())
+
+async def time_full(db, limit: int) -> float:
+    start = time.perf_counter()
+    result = await db.execute(full_page_query(limit))
+    [serialize_full(row[0], dict(zip(METRIC_FIELDS, (int(value) for value in row[1:])))) for row in result.all()]
+    elapsed = time.perf_counter() - start
+    db.expunge_all()
+    return elapsed
+
+async def time_slim(db, limit: int) -> float:
+    start = time.perf_counter()
+    result = await db.execute(slim_page_query(limit))
+    [serialize_prompt(row) for row in result.all()]
+    return time.perf_counter() - start
+
+async def run(pages: int, limit: int):
+    async with AsyncSessionLocal() as db:
+        full_bytes = await page_bytes(db, full_page_query(limit))
+        slim_bytes = await page_bytes(db, slim_page_query(limit))
+
+        # Warm up connections and statement caches
+        for _ in range(5):
+            await time_full(db, limit)
+            await time_slim(db, limit)
+
+        full_times = [await time_full(db, limit) for _ in range(pages)]
+        slim_times = [await time_slim(db, limit) for _ in range(pages)]
+
+    print(f"📊 {pages} pages of {limit} prompts")
+    for label, size, times in (("full rows", full_bytes, full_times), ("slim rows", slim_bytes, slim_times)):
+        times.sort()
+        print(f"{label:<10} {size:>10,} bytes/page   "
+              f"median {times[len(times) // 2] * 1000:.2f} ms   p95 {times[int(len(times) * 0.95)] * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full vs slim feed page loading")
+    parser.add_argument("--pages", type=int, default=200, help="pages to time per variant")
+    parser.add_argument("--limit", type=int, default=50, help="prompts per page")
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.limit))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark feed response rendering: FastAPI's default JSON path vs the orjson path used by main.py
+
+Serves the same synthetic feed page from two routes on one app and drives
+them in-process through the ASGI interface (no network, no database), so
+the numbers are requests per second for a single worker:
+
+    python bench_json.py --requests 2000 --limit 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.append(str(backend_dir))
+
+from fastapi import FastAPI
+
+from main import METRIC_FIELDS, PromptSummary, send_json, serialize_prompt
+
+def build_rows(limit: int) -> list:
+    """Slim rows shaped like select_list_rows results"""
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=f"prompt-{i}",
+            title=f"Prompt {i}",
+            model="Veo-3",
+            output_type="video",
+            tags=["cinematic", "product", "ad", "futuristic"],
+            source_url=f"https://www.instagram.com/p/{i}/",
+            attribution="Instagram (@evolving.ai)",
+            image_url=None,
+            created_at=now - timedelta(minutes=i),
+            author=None,
+            **{field: 1000 * i for field in METRIC_FIELDS}
+        )
+        for i in range(limit)
+    ]
+
+def build_app(rows: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default")
+    async def default_feed():
+        # Previous path: isoformat strings, then jsonable_encoder + json.dumps
+        return [{**serialize_prompt(row), "created_at": row.created_at.isoformat()} for row in rows]
+
+    @app.get("/orjson", response_model=List[PromptSummary])
+    async def orjson_feed():
+        return send_json([serialize_prompt(row) for row in rows])
+
+    return app
+
+async def call(app: FastAPI, path: str) -> int:
+    """Run one GET through the ASGI app, returning the response body size"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000)
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+async def run(requests: int, limit: int):
+    app = build_app(build_rows(limit))
+    print(f"📊 {requests} requests per route, {limit} prompts per page")
+    for path in ("/default", "/orjson"):
+        for _ in range(100):
+            size = await call(app, path)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await call(app, path)
+        elapsed = time.perf_counter() - start
+        print(f"{path:<10} {requests / elapsed:>8,.0f} req/s   {elapsed / requests * 1000:.3f} ms/req   {size:,} bytes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark default vs orjson feed rendering")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route")
+    parser.add_argument("--limit", type=int, default=50, help="prompts per page")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.limit))
@@ -0,0 +1,163 @@
+"""
+Negotiated gzip/brotli response compression, with reusable compressed bodies for cached responses
+"""
+
+import gzip
+import os
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Preferred first
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+COMPRESSION_STATS = {
+    "compressed": 0,        # responses compressed on the way out
+    "cached_hits": 0,       # cached bodies sent with an already compressed variant
+    "cached_compressed": 0, # compressed variants built for cached bodies
+    "bytes_in": 0,
+    "bytes_out": 0
+}
+
+def get_stats() -> dict:
+    stats = dict(COMPRESSION_STATS)
+    stats["ratio"] = stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else None
+    stats["encodings"] = list(ENCODINGS)
+    stats["min_size"] = COMPRESSION_MIN_SIZE
+    return stats
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding the client accepts (honoring q-values), or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best = max(ENCODINGS, key=lambda encoding: weights.get(encoding, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    # Server-sent events are flushed frame by frame and must not be buffered
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES) \
+        and not content_type.startswith("text/event-stream")
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of a compressed variant ("abc" -> "abc-gzip"), since each encoding is its own representation"""
+    if not encoding or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def etag_variants(etag: str) -> set:
+    """The ETag of every variant of a response: identity plus one per encoding"""
+    return {etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS)}
+
+class CachedBody:
+    """A rendered response kept in a cache, with each compressed variant built on first use"""
+
+    def __init__(self, response: Response):
+        self.body = response.body
+        self.headers = {
+            name: value for name, value in response.headers.items() if name != "content-length"
+        }
+        self.encoded: Dict[str, bytes] = {}
+
+    def respond(self, accept_encoding: Optional[str], headers: Optional[dict] = None) -> Response:
+        """Build a response for the client, reusing a previously compressed body when there is one"""
+        response_headers = {
+            **self.headers,
+            **{name.lower(): value for name, value in (headers or {}).items()},
+            "vary": "Accept-Encoding"
+        }
+        encoding = choose_encoding(accept_encoding) if len(self.body) >= COMPRESSION_MIN_SIZE else None
+        if not encoding:
+            return Response(self.body, headers=response_headers)
+
+        body = self.encoded.get(encoding)
+        if body is None:
+            body = self.encoded[encoding] = compress(self.body, encoding)
+            COMPRESSION_STATS["cached_compressed"] += 1
+        else:
+            COMPRESSION_STATS["cached_hits"] += 1
+        COMPRESSION_STATS["bytes_in"] += len(self.body)
+        COMPRESSION_STATS["bytes_out"] += len(body)
+        response_headers["Content-Encoding"] = encoding
+        if "etag" in response_headers:
+            response_headers["etag"] = encoded_etag(response_headers["etag"], encoding)
+        return Response(body, headers=response_headers)
+
+class CompressionMiddleware:
+    """Compress complete JSON/text responses for clients that accept gzip or brotli
+
+    Responses that already carry a Content-Encoding (cached bodies sent by
+    CachedBody.respond) and streamed responses pass through unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = is_compressible(headers.get("content-type")) and "content-encoding" not in headers
+            if compressible and "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if compressible and encoding and not message.get("more_body") and len(body) >= self.minimum_size:
+                COMPRESSION_STATS["compressed"] += 1
+                COMPRESSION_STATS["bytes_in"] += len(body)
+                body = compress(body, encoding)
+                COMPRESSION_STATS["bytes_out"] += len(body)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                message = {**message, "body": body}
+
+            await send(start_message)
+            start_message = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
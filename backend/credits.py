@@ -0,0 +1,240 @@
+"""
+Platform credit ledger: in-memory reservations against users.model_credits_remaining, debited in batches
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy import bindparam, func, select, update, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from database import async_engine, User
+
+# Debits are written to Postgres every CREDIT_FLUSH_INTERVAL seconds
+CREDIT_FLUSH_INTERVAL = float(os.getenv("CREDIT_FLUSH_INTERVAL", "1"))
+# Idle balances are re-read after this many seconds, to pick up top-ups made elsewhere
+CREDIT_BALANCE_TTL = float(os.getenv("CREDIT_BALANCE_TTL", "30"))
+# Safety net: reservations still unsettled after this many seconds are refunded
+CREDIT_RESERVATION_TTL = float(os.getenv("CREDIT_RESERVATION_TTL", "3600"))
+
+class InsufficientCredits(Exception):
+    """Raised when a user's available credits do not cover a reservation"""
+
+class UnknownUser(Exception):
+    """Raised when credits are reserved for a user that does not exist"""
+
+class Reservation:
+    """Credits held for one run until it is committed or released"""
+
+    __slots__ = ("user_id", "amount", "created_at", "settled", "deferred")
+
+    def __init__(self, user_id: int, amount: int):
+        self.user_id = user_id
+        self.amount = amount
+        self.created_at = time.monotonic()
+        self.settled = False
+        self.deferred = False  # handed to a background job, which settles it when it finishes
+
+class Account:
+    __slots__ = ("balance", "reserved", "pending", "loaded_at")
+
+    def __init__(self, balance: int):
+        self.balance = balance  # last balance read from Postgres, minus debits since
+        self.reserved = 0       # held by runs in flight
+        self.pending = 0        # committed debits not yet written to Postgres
+        self.loaded_at = time.monotonic()
+
+def build_debit_statement():
+    """UPDATE users ... FROM unnest(:user_ids, :amounts), one statement per flush
+
+    Balances never go below zero, and RETURNING gives the stored balance
+    (including top-ups made by other writers) to resync the in-memory one.
+    """
+    debits = func.unnest(
+        bindparam("user_ids", type_=ARRAY(Integer)), bindparam("amounts", type_=ARRAY(Integer))
+    ).table_valued("user_id", "amount").render_derived(name="debit")
+    return update(User).values(
+        model_credits_remaining=func.greatest(User.model_credits_remaining - debits.c.amount, 0)
+    ).where(
+        User.id == debits.c.user_id
+    ).returning(User.id, User.model_credits_remaining)
+
+DEBIT_CREDITS = build_debit_statement()
+
+class CreditLedger:
+    """Checks and holds platform credits per user without touching Postgres on the run path
+
+    Balances are loaded once per user and then tracked in memory: reserving,
+    committing and refunding credits are plain arithmetic on the event loop,
+    so concurrent runs for one user never wait on a row lock. Committed
+    debits are written out in batches by a background task.
+    """
+
+    def __init__(self, flush_interval: float = CREDIT_FLUSH_INTERVAL, balance_ttl: float = CREDIT_BALANCE_TTL,
+                 reservation_ttl: float = CREDIT_RESERVATION_TTL):
+        self.flush_interval = flush_interval
+        self.balance_ttl = balance_ttl
+        self.reservation_ttl = reservation_ttl
+        self.accounts: Dict[int, Account] = {}
+        self.outstanding: Set[Reservation] = set()
+        self.loading: Dict[int, asyncio.Future] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.wake: Optional[asyncio.Event] = None
+        self.stopping = False
+        self.reservations = 0
+        self.commits = 0
+        self.refunds = 0
+        self.expired = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        self.wake = asyncio.Event()
+        self.stopping = False
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out every committed debit"""
+        if self.task:
+            self.stopping = True
+            self.wake.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+    async def reserve(self, user_id: int, amount: int) -> Reservation:
+        """Hold amount credits for a run, or raise InsufficientCredits"""
+        account = await self._account(user_id)
+        available = account.balance - account.reserved
+        if available < amount:
+            self.rejected += 1
+            raise InsufficientCredits(f"Not enough credits: {amount} needed, {max(available, 0)} available")
+
+        account.reserved += amount
+        reservation = Reservation(user_id, amount)
+        self.outstanding.add(reservation)
+        self.reservations += 1
+        return reservation
+
+    def commit(self, reservation: Reservation):
+        """Spend a reservation; the debit reaches Postgres with the next flush"""
+        if not self._settle(reservation):
+            return
+        account = self.accounts[reservation.user_id]
+        account.balance -= reservation.amount
+        account.pending += reservation.amount
+        self.commits += 1
+
+    def release(self, reservation: Reservation):
+        """Refund a reservation that was not used"""
+        if self._settle(reservation):
+            self.refunds += 1
+
+    def settle(self, reservation: Reservation, charge: bool):
+        """Commit the reservation if charge, otherwise refund it"""
+        if charge:
+            self.commit(reservation)
+        else:
+            self.release(reservation)
+
+    def _settle(self, reservation: Reservation) -> bool:
+        if reservation.settled:
+            return False
+        reservation.settled = True
+        self.outstanding.discard(reservation)
+        self.accounts[reservation.user_id].reserved -= reservation.amount
+        return True
+
+    async def _account(self, user_id: int) -> Account:
+        account = self.accounts.get(user_id)
+        if account and (account.reserved or account.pending
+                        or time.monotonic() - account.loaded_at < self.balance_ttl):
+            return account
+
+        # One balance read per user, however many runs arrive while it is in flight
+        loading = self.loading.get(user_id)
+        if loading is None:
+            loading = self.loading[user_id] = asyncio.ensure_future(self._load_balance(user_id))
+            loading.add_done_callback(lambda _: self.loading.pop(user_id, None))
+        balance = await asyncio.shield(loading)
+
+        account = self.accounts.get(user_id)
+        if account is None or not (account.reserved or account.pending):
+            account = self.accounts[user_id] = Account(balance)
+        return account
+
+    @staticmethod
+    async def _load_balance(user_id: int) -> int:
+        async with async_engine.connect() as conn:
+            balance = await conn.scalar(select(User.model_credits_remaining).where(User.id == user_id))
+            if balance is None and not await conn.scalar(select(User.id).where(User.id == user_id)):
+                raise UnknownUser(f"User {user_id} not found")
+        return balance or 0
+
+    async def _run(self):
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            self._expire_reservations()
+            await self.flush()
+
+    def _expire_reservations(self):
+        cutoff = time.monotonic() - self.reservation_ttl
+        for reservation in [r for r in self.outstanding if r.created_at < cutoff]:
+            if self._settle(reservation):
+                self.expired += 1
+
+    async def flush(self) -> bool:
+        """Write every pending debit in one statement; on failure the debits stay pending"""
+        debits = {user_id: account.pending for user_id, account in self.accounts.items() if account.pending}
+        if not debits:
+            return True
+        for user_id in debits:
+            self.accounts[user_id].pending = 0
+
+        try:
+            async with async_engine.begin() as conn:
+                result = await conn.execute(
+                    DEBIT_CREDITS, {"user_ids": list(debits), "amounts": list(debits.values())}
+                )
+                stored = result.all()
+        except Exception as e:
+            self.flush_errors += 1
+            self.last_error = str(e)
+            for user_id, amount in debits.items():
+                self.accounts[user_id].pending += amount
+            return False
+
+        # Resync with Postgres, keeping debits committed while the flush ran
+        for user_id, remaining in stored:
+            account = self.accounts[user_id]
+            account.balance = remaining - account.pending
+            account.loaded_at = time.monotonic()
+        self.flushes += 1
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "accounts": len(self.accounts),
+            "reserved": sum(account.reserved for account in self.accounts.values()),
+            "pending_debits": sum(account.pending for account in self.accounts.values()),
+            "outstanding_reservations": len(self.outstanding),
+            "reservations": self.reservations,
+            "commits": self.commits,
+            "refunds": self.refunds,
+            "expired": self.expired,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_error": self.last_error
+        }
+
+# App-wide ledger, started and stopped by the FastAPI lifespan in main.py
+credit_ledger = CreditLedger()
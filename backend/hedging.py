@@ -0,0 +1,130 @@
+"""
+Hedged requests: race a backup call against a slow primary to cut tail latency
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Send the hedge once the primary is slower than this percentile of its recent latencies
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+# Latencies needed before a model is hedged at all
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+
+class ModelHedgeStats:
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.primary_wins = 0
+        self.hedge_wins = 0
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+class Hedger:
+    """Tracks per-model latency and runs hedged calls"""
+
+    def __init__(self, enabled: bool = HEDGE_ENABLED, percentile: float = HEDGE_PERCENTILE,
+                 min_samples: int = HEDGE_MIN_SAMPLES, min_delay: float = HEDGE_MIN_DELAY):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.models: Dict[str, ModelHedgeStats] = {}
+
+    def stats_for(self, model: str) -> ModelHedgeStats:
+        stats = self.models.get(model)
+        if stats is None:
+            stats = self.models[model] = ModelHedgeStats()
+        return stats
+
+    def record_latency(self, model: str, seconds: float):
+        self.stats_for(model).latencies.append(seconds)
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """How long to wait on the primary before hedging, or None if it should not be hedged"""
+        stats = self.stats_for(model)
+        if not self.enabled or len(stats.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, stats.percentile(self.percentile))
+
+    async def run(self, model: str, primary: Callable[[], Awaitable], hedge: Optional[Callable[[], Awaitable]],
+                  succeeded: Callable[[object], bool]) -> Tuple[object, bool]:
+        """Run primary, racing hedge against it once it is slower than the hedge delay
+
+        Returns (result, hedge_won). The first successful result wins and the
+        other call is cancelled; if the first to finish failed, the other is
+        awaited instead.
+        """
+        stats = self.stats_for(model)
+        stats.requests += 1
+        delay = self.hedge_delay(model) if hedge else None
+
+        primary_task = asyncio.create_task(primary())
+        if delay is None:
+            return await primary_task, False
+
+        pending = {primary_task}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                stats.primary_wins += 1
+                return primary_task.result(), False
+
+            stats.hedged += 1
+            hedge_task = asyncio.create_task(hedge())
+            pending.add(hedge_task)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and succeeded(task.result()):
+                        if task is hedge_task:
+                            stats.hedge_wins += 1
+                        else:
+                            stats.primary_wins += 1
+                        return task.result(), task is hedge_task
+            # Both failed: surface the primary's outcome
+            return primary_task.result(), False
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> dict:
+        result = {}
+        for model, stats in self.models.items():
+            result[model] = {
+                "requests": stats.requests,
+                "hedged": stats.hedged,
+                "hedge_rate": stats.hedged / stats.requests if stats.requests else 0.0,
+                "hedge_wins": stats.hedge_wins,
+                "primary_wins": stats.primary_wins,
+                "latency_samples": len(stats.latencies),
+                "p50_seconds": stats.percentile(50),
+                "hedge_after_seconds": self.hedge_delay(model)
+            }
+        return {"enabled": self.enabled, "models": result}
+
+# Shared hedger for handle_text_generation in main.py
+hedger = Hedger()
+
+def timed(model: str, call: Callable[[], Awaitable], succeeded: Callable[[object], bool]):
+    """Wrap a call so its latency is recorded for model when it succeeds"""
+    async def run():
+        start = time.monotonic()
+        result = await call()
+        if succeeded(result):
+            hedger.record_latency(model, time.monotonic() - start)
+        return result
+    return run
@@ -0,0 +1,136 @@
+"""
+Shared, pooled aiohttp client for outbound model provider calls
+"""
+
+import os
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+
+# Pool configuration. Every setting can be overridden per provider by
+# appending the provider name, e.g. HTTP_POOL_LIMIT_OPENAI=200
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "30"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+# Overall request deadlines are set per model in main.py; this only bounds connecting
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+
+def provider_setting(name: str, provider: str, default):
+    """Read a pool setting, preferring the provider-specific override"""
+    value = os.getenv(f"{name}_{provider.upper()}")
+    if value is None or value.strip() == '':
+        return default
+    return type(default)(value)
+
+class ProviderPool:
+    """One long-lived keep-alive session per provider, each with its own connector limits"""
+
+    def __init__(self):
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.stats: Dict[str, dict] = {}
+
+    def _trace_config(self, provider: str) -> aiohttp.TraceConfig:
+        """Build a TraceConfig that counts connection and DNS activity for a provider"""
+        stats = self.stats.setdefault(provider, {
+            "requests": 0,
+            "in_flight": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "connections_queued": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+            "errors": 0
+        })
+
+        async def on_request_start(session, ctx, params):
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+
+        async def on_request_end(session, ctx, params):
+            stats["in_flight"] -= 1
+
+        async def on_request_exception(session, ctx, params):
+            stats["in_flight"] -= 1
+            stats["errors"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats["connections_reused"] += 1
+
+        async def on_connection_queued_start(session, ctx, params):
+            stats["connections_queued"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            stats["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            stats["dns_cache_misses"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    def _create_session(self, provider: str) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=provider_setting("HTTP_POOL_LIMIT", provider, HTTP_POOL_LIMIT),
+            limit_per_host=provider_setting("HTTP_POOL_LIMIT_PER_HOST", provider, HTTP_POOL_LIMIT_PER_HOST),
+            ttl_dns_cache=provider_setting("HTTP_DNS_CACHE_TTL", provider, HTTP_DNS_CACHE_TTL),
+            keepalive_timeout=provider_setting("HTTP_KEEPALIVE_TIMEOUT", provider, HTTP_KEEPALIVE_TIMEOUT),
+            use_dns_cache=True
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=provider_setting("HTTP_CONNECT_TIMEOUT", provider, HTTP_CONNECT_TIMEOUT)
+            ),
+            trace_configs=[self._trace_config(provider)]
+        )
+
+    async def start(self, providers: Iterable[str]):
+        """Open a session for every known provider (called from the app lifespan)"""
+        for provider in providers:
+            self.get_session(provider)
+
+    def get_session(self, provider: str) -> aiohttp.ClientSession:
+        """Return the pooled session for a provider, creating it on first use"""
+        session = self.sessions.get(provider)
+        if session is None or session.closed:
+            session = self._create_session(provider)
+            self.sessions[provider] = session
+        return session
+
+    async def close(self):
+        """Close every session and release pooled connections"""
+        for session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+
+    def get_stats(self, provider: Optional[str] = None) -> dict:
+        """Connection pool limits and counters, keyed by provider"""
+        result = {}
+        for name, session in self.sessions.items():
+            if provider and name != provider:
+                continue
+            connector = session.connector
+            result[name] = {
+                "limit": connector.limit if connector else None,
+                "limit_per_host": connector.limit_per_host if connector else None,
+                "closed": session.closed,
+                **self.stats.get(name, {})
+            }
+        return result
+
+# App-wide pool, opened and closed by the FastAPI lifespan in main.py
+http_pool = ProviderPool()
@@ -3,13 +3,17 @@
 Import CSV data into PostgreSQL database
 """
 
+import argparse
 import csv
 import json
 import os
+import re
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 
 # Add the backend directory to the Python path
 backend_dir = Path(__file__).parent
@@ -47,35 +51,37 @@ def parse_tags(tags_str):
     return [tag.strip() for tag in tags_str.split(',') if tag.strip()]
 
 def parse_metrics(metrics_text):
-    """Parse metrics from text like '14k likes, 8026 comments'"""
+    """Parse metrics from text like '14k likes, 8026 comments' or '30.1M views, 141K likes, 12K comments'"""
     if not metrics_text:
         return {}
     
     metrics = {}
+    multipliers = {'': 1, 'k': 1000, 'm': 1000000}
     
-    # Extract numbers from text
-    if 'likes' in metrics_text:
-        likes_match = metrics_text.split('likes')[0].strip()
-        if likes_match.endswith('k'):
-            metrics['likes'] = int(float(likes_match[:-1]) * 1000)
-        else:
-            try:
-                metrics['likes'] = int(likes_match)
-            except ValueError:
-                metrics['likes'] = 0
-    
-    if 'comments' in metrics_text:
-        comments_match = metrics_text.split('comments')[0].split(',')[-1].strip()
+    # Extract "<number>[k|M] <label>" pairs from the text
+    for number, suffix, label in re.findall(r'([\d.]+)\s*([kKmM]?)\s+(like|comment)s?\b', metrics_text):
         try:
-            metrics['comments'] = int(comments_match)
+            metrics[f"{label}s"] = int(float(number) * multipliers[suffix.lower()])
         except ValueError:
-            metrics['comments'] = 0
+            metrics[f"{label}s"] = 0
     
     return metrics
 
+def parse_count(count_str):
+    """Parse a numeric CSV cell such as '9600000.0' into an int"""
+    if not count_str or count_str.strip() == '':
+        return 0
+    try:
+        return int(float(count_str))
+    except ValueError:
+        return 0
+
+DEFAULT_CSV_PATH = backend_dir / "data" / "pronto_prompts_metrics.csv"
+BULK_BATCH_SIZE = 5000
+
 def import_csv_data():
     """Import data from CSV file into database"""
-    csv_path = backend_dir / "data" / "pronto_prompts_metrics.csv"
+    csv_path = DEFAULT_CSV_PATH
     
     if not csv_path.exists():
         print(f"❌ CSV file not found: {csv_path}")
@@ -126,7 +132,7 @@ def import_csv_data():
                         prompt_id=row['id'],
                         provider='instagram',  # Default from attribution
                         metric_date=datetime.now().date(),
-                        views=int(row['latest_views']) if row['latest_views'] else 0,
+                        views=parse_count(row['latest_views']),
                         likes=metrics.get('likes', 0),
                         shares=0,  # Not in CSV
                         comments=metrics.get('comments', 0)
@@ -146,5 +152,130 @@ def import_csv_data():
     finally:
         db.close()
 
+def build_prompt_row(row):
+    """Map a CSV row to a prompts table row"""
+    return {
+        "id": row['id'],
+        "title": row['title'],
+        "prompt_text": row['prompt_text'],  # Keep full JSON
+        "model": row['model'],
+        "output_type": row['output_type'],
+        "tags": parse_tags(row['tags']),
+        "source_url": row['source_url'],
+        "attribution": row['attribution'],
+        "image_url": row['image_url'] if row['image_url'] else None,
+        "submitted_by": None,  # Admin uploaded, no user
+        "created_at": datetime.fromisoformat(row['created_at'].replace('Z', '+00:00'))
+    }
+
+def build_metric_row(row, metric_date):
+    """Map a CSV row to a prompt_metrics table row, or None if it has no metrics"""
+    metrics = parse_metrics(row['latest_metrics_text'])
+    if not metrics:
+        return None
+    return {
+        "prompt_id": row['id'],
+        "provider": 'instagram',  # Default from attribution
+        "metric_date": metric_date,
+        "views": parse_count(row['latest_views']),
+        "likes": metrics.get('likes', 0),
+        "shares": 0,  # Not in CSV
+        "comments": metrics.get('comments', 0)
+    }
+
+def iter_chunks(reader, size):
+    """Yield lists of up to size rows from a CSV reader without loading the whole file"""
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def upsert_prompts(conn, rows):
+    """Multi-row INSERT ... ON CONFLICT (id) DO UPDATE into prompts"""
+    stmt = insert(Prompt.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Prompt.__table__.c.id],
+        set_={name: stmt.excluded[name] for name in rows[0] if name != "id"}
+    )
+    conn.execute(stmt, rows)
+
+def upsert_metrics(conn, rows):
+    """Multi-row INSERT ... ON CONFLICT (prompt_id, provider, metric_date) DO UPDATE into prompt_metrics"""
+    table = PromptMetric.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.prompt_id, table.c.provider, table.c.metric_date],
+        set_={name: stmt.excluded[name] for name in ("views", "likes", "shares", "comments")}
+    )
+    conn.execute(stmt, rows)
+
+def bulk_import_csv_data(csv_path=DEFAULT_CSV_PATH, batch_size=BULK_BATCH_SIZE):
+    """Stream a CSV into the database in chunks of multi-row upserts
+    
+    Each chunk is upserted and committed on its own, so re-running the import
+    over the same dump updates rows in place instead of failing on duplicate
+    keys, and memory use stays flat regardless of file size.
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        print(f"❌ CSV file not found: {csv_path}")
+        return
+    
+    metric_date = datetime.now().date()
+    total_rows = 0
+    total_metrics = 0
+    start = time.perf_counter()
+    
+    print(f"📊 Bulk importing {csv_path.name} in batches of {batch_size}...")
+    
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file, engine.connect() as conn:
+        reader = csv.DictReader(file)
+        
+        for chunk in iter_chunks(reader, batch_size):
+            # ON CONFLICT cannot touch the same row twice in one statement,
+            # so keep only the last occurrence of each key within a chunk
+            prompts = {}
+            metrics = {}
+            for row in chunk:
+                prompts[row['id']] = build_prompt_row(row)
+                metric = build_metric_row(row, metric_date)
+                if metric:
+                    metrics[(metric["prompt_id"], metric["provider"], metric["metric_date"])] = metric
+            
+            try:
+                upsert_prompts(conn, list(prompts.values()))
+                if metrics:
+                    upsert_metrics(conn, list(metrics.values()))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error importing batch ending at line {reader.line_num}: {e}")
+                raise
+            
+            total_rows += len(chunk)
+            total_metrics += len(metrics)
+            elapsed = time.perf_counter() - start
+            print(f"✅ {total_rows} rows committed ({total_rows / elapsed:,.0f} rows/s)")
+    
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    print(f"🎉 Upserted {total_rows} prompts and {total_metrics} metric snapshots "
+          f"in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
 if __name__ == "__main__":
-    import_csv_data()
+    parser = argparse.ArgumentParser(description="Import prompt CSV data into PostgreSQL")
+    parser.add_argument("--bulk", action="store_true",
+                        help="stream the CSV in chunks of multi-row ON CONFLICT upserts (safe to re-run)")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV_PATH), help="CSV file to import (bulk mode)")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE,
+                        help="rows per upsert/commit (bulk mode)")
+    args = parser.parse_args()
+    
+    if args.bulk:
+        bulk_import_csv_data(args.csv, args.batch_size)
+    else:
+        import_csv_data()
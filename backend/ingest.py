@@ -0,0 +1,248 @@
+"""
+Buffered bulk ingestion of prompt_metrics snapshots, flushed as multi-row upserts
+"""
+
+import asyncio
+import hmac
+import os
+import time
+from collections import deque
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from fastapi import Header, HTTPException
+from pydantic import BaseModel
+from sqlalchemy import bindparam, func, select, BigInteger, Date, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+
+from database import async_engine, Prompt, PromptMetric
+from read_cache import read_cache, METRIC_NAMESPACES
+
+# Flush once this many snapshots are buffered, or every METRICS_FLUSH_INTERVAL seconds
+METRICS_FLUSH_ROWS = int(os.getenv("METRICS_FLUSH_ROWS", "5000"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+# Writers wait (up to METRICS_INGEST_TIMEOUT seconds) while the buffer is full
+METRICS_BUFFER_MAX_ROWS = int(os.getenv("METRICS_BUFFER_MAX_ROWS", "50000"))
+METRICS_INGEST_TIMEOUT = float(os.getenv("METRICS_INGEST_TIMEOUT", "10"))
+# Rows per upsert statement
+METRICS_UPSERT_BATCH = 5000
+# Shared secret scrapers send as "Authorization: Bearer <token>"; ingestion is refused while unset
+METRICS_INGEST_TOKEN = os.getenv("METRICS_INGEST_TOKEN", "")
+
+METRIC_COUNTS = ("views", "likes", "shares", "comments")
+
+MetricKey = Tuple[str, str, date]
+
+class MetricSnapshot(BaseModel):
+    prompt_id: str
+    provider: str
+    metric_date: date
+    views: Optional[int] = None
+    likes: Optional[int] = None
+    shares: Optional[int] = None
+    comments: Optional[int] = None
+
+class IngestBufferFull(Exception):
+    """Raised when the buffer stays full for longer than the ingest timeout"""
+
+def require_scraper_token(authorization: Optional[str] = Header(None)):
+    """FastAPI dependency: reject ingest requests without the scrapers' shared token"""
+    if not METRICS_INGEST_TOKEN:
+        raise HTTPException(status_code=503, detail="Metrics ingestion is not configured")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), METRICS_INGEST_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid scraper token", headers={"WWW-Authenticate": "Bearer"})
+
+async def iter_lines(chunks):
+    """Split a streamed request body into lines without reading it all into memory"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+# One array parameter per column, so the statement is the same (and compiled
+# once) whatever the batch size
+UPSERT_COLUMNS = {
+    "prompt_id": String,
+    "provider": String,
+    "metric_date": Date,
+    **{name: BigInteger for name in METRIC_COUNTS}
+}
+
+def build_upsert_statement():
+    """Multi-row INSERT ... SELECT FROM unnest(...) ON CONFLICT (prompt_id, provider, metric_date) DO UPDATE
+
+    Snapshots for prompts that do not exist are skipped (prompt_metrics.prompt_id
+    references prompts), and counts missing from a snapshot keep their stored value.
+    """
+    table = PromptMetric.__table__
+    snapshots = func.unnest(
+        *[bindparam(name, type_=ARRAY(type_)) for name, type_ in UPSERT_COLUMNS.items()]
+    ).table_valued(*UPSERT_COLUMNS).render_derived(name="snapshot")
+    stmt = insert(table).from_select(
+        list(UPSERT_COLUMNS),
+        select(*[snapshots.c[name] for name in UPSERT_COLUMNS]).join(Prompt, Prompt.id == snapshots.c.prompt_id)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.prompt_id, table.c.provider, table.c.metric_date],
+        set_={name: func.coalesce(stmt.excluded[name], table.c[name]) for name in METRIC_COUNTS}
+    )
+
+UPSERT_METRICS = build_upsert_statement()
+
+class MetricsIngestBuffer:
+    """In-memory write buffer for metric snapshots
+
+    Snapshots are keyed by the prompt_metrics primary key, so repeats of the
+    same (prompt, provider, day) before a flush collapse to the latest one.
+    A background task writes the buffer out in multi-row upserts.
+    """
+
+    def __init__(self, max_rows: int = METRICS_BUFFER_MAX_ROWS, flush_rows: int = METRICS_FLUSH_ROWS,
+                 flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.buffer: Dict[MetricKey, dict] = {}
+        self.changed: Optional[asyncio.Condition] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.received = 0
+        self.written = 0
+        self.unknown_prompts = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.backpressure_waits = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_seconds: Optional[float] = None
+        self.last_flush_rows = 0
+        self.recent = deque()  # (timestamp, rows received) over the last minute
+
+    async def start(self):
+        self.changed = asyncio.Condition()
+        self.stopping = False
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out whatever is still buffered
+
+        The flusher is never cancelled mid-flush, since that would drop the
+        rows it has taken out of the buffer.
+        """
+        if self.task:
+            self.stopping = True
+            async with self.changed:
+                self.changed.notify_all()
+            await self.task
+            self.task = None
+        while self.buffer:
+            if not await self.flush():
+                break
+
+    async def add(self, snapshot: MetricSnapshot, timeout: float = METRICS_INGEST_TIMEOUT):
+        """Buffer a snapshot, waiting for a flush if the buffer is full"""
+        key = (snapshot.prompt_id, snapshot.provider, snapshot.metric_date)
+        async with self.changed:
+            if key not in self.buffer and len(self.buffer) >= self.max_rows:
+                self.backpressure_waits += 1
+                self.changed.notify_all()
+                try:
+                    await asyncio.wait_for(
+                        self.changed.wait_for(lambda: len(self.buffer) < self.max_rows), timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise IngestBufferFull("Metrics buffer is full, retry later")
+            self.buffer[key] = snapshot.model_dump()
+            self.received += 1
+            if len(self.buffer) >= self.flush_rows:
+                self.changed.notify_all()
+
+        now = time.monotonic()
+        if self.recent and now - self.recent[-1][0] < 1:
+            self.recent[-1] = (self.recent[-1][0], self.recent[-1][1] + 1)
+        else:
+            self.recent.append((now, 1))
+
+    async def _run(self):
+        while not self.stopping:
+            async with self.changed:
+                try:
+                    await asyncio.wait_for(
+                        self.changed.wait_for(
+                            lambda: self.stopping or len(self.buffer) >= min(self.flush_rows, self.max_rows)
+                        ),
+                        self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            if self.buffer:
+                await self.flush()
+
+    async def flush(self) -> bool:
+        """Write the current buffer out; on failure the rows are put back for the next attempt"""
+        async with self.changed:
+            pending, self.buffer = self.buffer, {}
+            self.changed.notify_all()
+        if not pending:
+            return True
+
+        start = time.monotonic()
+        pending_rows = list(pending.values())
+        written = 0
+        try:
+            async with async_engine.begin() as conn:
+                for i in range(0, len(pending_rows), METRICS_UPSERT_BATCH):
+                    batch = pending_rows[i:i + METRICS_UPSERT_BATCH]
+                    result = await conn.execute(
+                        UPSERT_METRICS, {name: [row[name] for row in batch] for name in UPSERT_COLUMNS}
+                    )
+                    written += result.rowcount
+        except Exception as e:
+            self.flush_errors += 1
+            self.last_error = str(e)
+            async with self.changed:
+                # Snapshots that arrived during the failed flush are newer, so they win
+                for key, row in pending.items():
+                    self.buffer.setdefault(key, row)
+            return False
+
+        # Core connections bypass the Session write hooks that keep the read cache fresh;
+        # only responses that show metrics are dropped
+        if written:
+            read_cache.invalidate(METRIC_NAMESPACES, {("prompt", row["prompt_id"]) for row in pending_rows})
+        self.unknown_prompts += len(pending_rows) - written
+        self.written += written
+        self.flushes += 1
+        self.last_flush_seconds = time.monotonic() - start
+        self.last_flush_rows = written
+        return True
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        while self.recent and now - self.recent[0][0] > 60:
+            self.recent.popleft()
+        window = now - self.recent[0][0] if self.recent else 0
+        return {
+            "buffered": len(self.buffer),
+            "max_rows": self.max_rows,
+            "received": self.received,
+            "written": self.written,
+            "unknown_prompts": self.unknown_prompts,
+            "received_per_second": sum(count for _, count in self.recent) / max(window, 1.0),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_rows": self.last_flush_rows,
+            "last_flush_seconds": self.last_flush_seconds,
+            "backpressure_waits": self.backpressure_waits,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
+
+# App-wide buffer, started and stopped by the FastAPI lifespan in main.py
+metrics_ingest = MetricsIngestBuffer()
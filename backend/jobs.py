@@ -0,0 +1,151 @@
+"""
+Bounded async worker pool for image/video generation jobs, persisted in the jobs table
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from database import SessionLocal, Job
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class JobRunner:
+    """Runs provider calls on a fixed number of worker tasks, off the request path
+
+    Job rows record status and timings; the callables themselves (which may
+    close over a user's API key) only ever live in memory.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks = []
+        # Job IDs submitted by this process and not yet finished, with their on_finish callbacks
+        self.pending: Dict[str, List[Callable[[bool], None]]] = {}
+        self.status_errors = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        # Unfinished work cannot be resumed (API keys are never persisted)
+        for job_id in list(self.pending):
+            await self._record(job_id, status="failed",
+                               error="Interrupted by server shutdown", completed_at=datetime.utcnow())
+            self._finish(job_id, False)
+
+    async def submit(self, model: str, job_type: str, prompt: str,
+                     work: Callable[[], Awaitable[dict]], timeout: Optional[float] = None,
+                     on_finish: Optional[Callable[[bool], None]] = None) -> str:
+        """Persist a new job and queue its work, returning the job ID
+
+        The work is cancelled and the job failed if it runs longer than timeout seconds.
+        Once the job is accepted, on_finish is called exactly once with whether it
+        completed, however it ends (including server shutdown).
+        """
+        if self.queue is None or self.queue.full():
+            raise JobQueueFull("Job queue is full, try again later")
+
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._create, job_id, model, job_type, prompt)
+        try:
+            self.queue.put_nowait((job_id, work, timeout))
+        except asyncio.QueueFull:
+            await asyncio.to_thread(self._update, job_id, status="failed",
+                                    error="Job queue is full", completed_at=datetime.utcnow())
+            raise JobQueueFull("Job queue is full, try again later")
+        self.pending[job_id] = [on_finish] if on_finish else []
+        return job_id
+
+    def add_on_finish(self, job_id: str, on_finish: Callable[[bool], None]) -> bool:
+        """Also call on_finish when a pending job ends; False if it already has"""
+        if job_id not in self.pending:
+            return False
+        self.pending[job_id].append(on_finish)
+        return True
+
+    async def _worker(self):
+        while True:
+            job_id, work, timeout = await self.queue.get()
+            completed = False
+            try:
+                await self._record(job_id, status="processing", started_at=datetime.utcnow())
+                try:
+                    result = await asyncio.wait_for(work(), timeout)
+                except asyncio.CancelledError:
+                    raise
+                except asyncio.TimeoutError:
+                    await self._record(job_id, status="failed",
+                                       error=f"Timed out after {timeout:g}s", completed_at=datetime.utcnow())
+                except Exception as e:
+                    await self._record(job_id, status="failed", error=str(e), completed_at=datetime.utcnow())
+                else:
+                    completed = True
+                    await self._record(job_id, status="completed", result=result, completed_at=datetime.utcnow())
+                self._finish(job_id, completed)
+            finally:
+                self.queue.task_done()
+
+    async def _record(self, job_id: str, **fields):
+        """Write a job's status, logging (not raising) errors so one bad write never stops a worker"""
+        try:
+            await asyncio.to_thread(self._update, job_id, **fields)
+        except Exception as e:
+            self.status_errors += 1
+            self.last_error = str(e)
+            logger.exception("Could not record status %r for job %s", fields.get("status"), job_id)
+
+    def _finish(self, job_id: str, completed: bool):
+        for on_finish in self.pending.pop(job_id, []):
+            try:
+                on_finish(completed)
+            except Exception:
+                logger.exception("on_finish failed for job %s", job_id)
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "pending": len(self.pending),
+            "status_errors": self.status_errors,
+            "last_error": self.last_error
+        }
+
+    @staticmethod
+    def _create(job_id: str, model: str, job_type: str, prompt: str):
+        db = SessionLocal()
+        try:
+            db.add(Job(id=job_id, model=model, job_type=job_type, status="submitted", prompt=prompt))
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update(job_id: str, **fields):
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(fields)
+            db.commit()
+        finally:
+            db.close()
+
+# App-wide runner, started and stopped by the FastAPI lifespan in main.py
+job_runner = JobRunner()
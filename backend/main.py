@@ -1,15 +1,35 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import func, literal, literal_column, select, true, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional, Union
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, ValidationError
 import json
+import base64
+import hashlib
 import asyncio
 import aiohttp
 import os
-from datetime import datetime
+from contextlib import asynccontextmanager
+from functools import partial
+from datetime import date, datetime, timezone
 
-from database import get_db, Prompt, PromptMetric, User
+from database import async_engine, get_db, get_async_db, Prompt, PromptMetricRollup, ModelCatalog, User, Job
+from http_client import http_pool
+from jobs import job_runner, JobQueueFull
+from read_cache import read_cache
+from run_cache import run_cache, run_request_key
+from singleflight import run_flights, stream_flights
+from provider_limits import provider_request, provider_schedulers, estimate_tokens, ProviderBusy
+from hedging import hedger, timed
+from trending import trending
+from ingest import metrics_ingest, iter_lines, require_scraper_token, MetricSnapshot, IngestBufferFull
+import compression
+from compression import CachedBody, CompressionMiddleware, etag_variants
+from credits import credit_ledger, InsufficientCredits, Reservation, UnknownUser
 
 # Pydantic models for API requests
 class RunRequest(BaseModel):
@@ -27,21 +47,105 @@ class RunResponse(BaseModel):
     image_url: Optional[str] = None
     job_id: Optional[str] = None
     error: Optional[str] = None
+    cached: bool = False
+    coalesced: bool = False
+    model: Optional[str] = None  # set when a hedged fallback model served the request
+    error_type: Optional[str] = None  # "timeout" | "provider_busy" | "cancelled" | "failed" | "insufficient_credits"
 
 class JobStatusResponse(BaseModel):
     job_id: str
     status: str  # "submitted", "processing", "completed", "failed"
     result: Optional[dict] = None
     error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
 
-app = FastAPI(title="Pronto API", description="Prompt sharing platform API")
+# Response shapes for the read endpoints, which render matching dicts with send_json
+class PromptMetrics(BaseModel):
+    views: int
+    likes: int
+    shares: int
+    comments: int
+
+class LatestMetrics(BaseModel):
+    metric_date: date
+    views: Optional[int] = None
+    likes: Optional[int] = None
+    shares: Optional[int] = None
+    comments: Optional[int] = None
+
+class PromptSummary(BaseModel):
+    id: str
+    title: Optional[str] = None
+    model: str
+    output_type: Optional[str] = None
+    tags: Optional[List[str]] = None
+    source_url: Optional[str] = None
+    attribution: Optional[str] = None
+    image_url: Optional[str] = None
+    created_at: datetime
+    author: str
+    metrics: PromptMetrics
+
+class PromptDetail(PromptSummary):
+    latest_metrics: Optional[LatestMetrics] = None
+    prompt_text: str
+
+class SearchResult(PromptSummary):
+    rank: float
+    snippet: Optional[str] = None
+
+class TrendingPrompt(PromptSummary):
+    trending_score: float
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class PromptFacets(BaseModel):
+    total: int
+    models: List[FacetCount]
+    output_types: List[FacetCount]
+    tags: List[FacetCount]
+
+class ModelCatalogEntry(BaseModel):
+    model: str
+    prompt_count: int
+    output_types: Dict[str, int]
+    latest_prompt_at: Optional[datetime] = None
+    runnable: bool
+    config_id: Optional[str] = None
+    type: Optional[str] = None
+    provider: Optional[str] = None
+    supports_streaming: bool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled keep-alive client per provider for the lifetime of the app
+    await http_pool.start(PLATFORM_KEYS.keys())
+    await job_runner.start()
+    await trending.start()
+    await metrics_ingest.start()
+    await credit_ledger.start()
+    yield
+    await credit_ledger.stop()
+    await metrics_ingest.stop()
+    await trending.stop()
+    await job_runner.stop()
+    await http_pool.close()
+    await async_engine.dispose()
+
+app = FastAPI(title="Pronto API", description="Prompt sharing platform API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"]
 )
+app.add_middleware(CompressionMiddleware)
 
 # Model configuration
 MODEL_CONFIGS = {
@@ -51,28 +155,34 @@ MODEL_CONFIGS = {
         "endpoint": "https://api.openai.com/v1/chat/completions",
         "model_name": "gpt-4o",
         "type": "text",
-        "supports_streaming": True
+        "supports_streaming": True,
+        "hedge_fallback": "claude-3-sonnet"
     },
     "gpt-4o-mini": {
         "provider": "openai", 
         "endpoint": "https://api.openai.com/v1/chat/completions",
         "model_name": "gpt-4o-mini",
         "type": "text",
-        "supports_streaming": True
+        "supports_streaming": True,
+        "timeout": 30,
+        "hedge_fallback": "claude-3-haiku"
     },
     "claude-3-sonnet": {
         "provider": "anthropic",
         "endpoint": "https://api.anthropic.com/v1/messages",
         "model_name": "claude-3-sonnet-20240229",
         "type": "text",
-        "supports_streaming": True
+        "supports_streaming": True,
+        "hedge_fallback": "gpt-4o"
     },
     "claude-3-haiku": {
         "provider": "anthropic",
         "endpoint": "https://api.anthropic.com/v1/messages", 
         "model_name": "claude-3-haiku-20240307",
         "type": "text",
-        "supports_streaming": True
+        "supports_streaming": True,
+        "timeout": 30,
+        "hedge_fallback": "gpt-4o-mini"
     },
     "gemini-pro": {
         "provider": "google",
@@ -95,7 +205,8 @@ MODEL_CONFIGS = {
         "endpoint": "https://api.openai.com/v1/images/generations",
         "model_name": "dall-e-3",
         "type": "image",
-        "supports_streaming": False
+        "supports_streaming": False,
+        "timeout": 90
     },
     "seedream": {
         "provider": "seedream",
@@ -143,18 +254,92 @@ PLATFORM_KEYS = {
 def read_root():
     return {"message": "Hello from Pronto backend!"}
 
-@app.post("/api/run", response_model=RunResponse)
-async def run_model(request: RunRequest):
-    """Execute a model with the given prompt"""
-    
-    # Validate model exists
-    if request.model not in MODEL_CONFIGS:
-        raise HTTPException(status_code=400, detail=f"Model {request.model} not supported")
-    
-    config = MODEL_CONFIGS[request.model]
-    
-    # Determine API key to use
-    api_key = None
+@app.get("/api/stats/http")
+def get_http_pool_stats(provider: Optional[str] = None):
+    """Get outbound connection pool limits and counters per provider"""
+    return http_pool.get_stats(provider)
+
+@app.get("/api/stats/providers")
+def get_provider_stats():
+    """Get outbound queue depth, rate limits and retry counters per provider"""
+    return provider_schedulers.get_stats()
+
+@app.get("/api/stats/hedging")
+def get_hedging_stats():
+    """Get hedge rates, wins and latency percentiles per model"""
+    return hedger.get_stats()
+
+@app.get("/api/stats/aborts")
+def get_abort_stats():
+    """Get counts of /api/run calls that timed out, were shed, or were abandoned by the client"""
+    return RUN_ABORTS
+
+@app.get("/api/stats/compression")
+def get_compression_stats():
+    """Get response compression counters, including reuse of cached compressed bodies"""
+    return compression.get_stats()
+
+@app.get("/api/stats/trending")
+def get_trending_stats():
+    """Get the size and freshness of the precomputed trending rankings"""
+    return trending.get_stats()
+
+@app.get("/api/stats/ingest")
+def get_ingest_stats():
+    """Get metrics ingestion buffer depth, throughput and flush counters"""
+    return metrics_ingest.get_stats()
+
+@app.get("/api/stats/credits")
+def get_credit_stats():
+    """Get platform credit reservations in flight, debits awaiting flush and refund counters"""
+    return credit_ledger.get_stats()
+
+@app.get("/api/stats/cache")
+def get_read_cache_stats():
+    """Get read cache size and hit/miss counters"""
+    return read_cache.get_stats()
+
+@app.get("/api/stats/run-cache")
+def get_run_cache_stats():
+    """Get /api/run result cache size and hit/miss counters"""
+    return run_cache.get_stats()
+
+@app.get("/api/stats/coalescing")
+def get_coalescing_stats():
+    """Get how often concurrent identical /api/run requests shared an upstream call"""
+    return {
+        "run": run_flights.get_stats(),
+        "stream": stream_flights.get_stats()
+    }
+
+@app.get("/api/stats/jobs")
+def get_job_stats():
+    """Get job worker pool size and queue depth"""
+    return job_runner.get_stats()
+
+def get_model_config(model: str) -> dict:
+    """Look up a model's config, rejecting unsupported models"""
+    if model not in MODEL_CONFIGS:
+        raise HTTPException(status_code=400, detail=f"Model {model} not supported")
+    return MODEL_CONFIGS[model]
+
+def is_runnable(config: dict) -> bool:
+    """Whether /api/run has an adapter for this model (video models need one in VIDEO_ADAPTERS)"""
+    return config["type"] != "video" or config["provider"] in VIDEO_ADAPTERS
+
+def calls_provider(config: dict) -> bool:
+    """Whether a run of this model reaches its provider (image models without an adapter get a placeholder)"""
+    if config["type"] == "image":
+        return config["provider"] in IMAGE_ADAPTERS
+    return is_runnable(config)
+
+def require_runnable(model: str, config: dict):
+    """Reject models that would only queue a job certain to fail"""
+    if not is_runnable(config):
+        raise HTTPException(status_code=501, detail=f"Video generation not implemented for {model}")
+
+def resolve_api_key(request: RunRequest, config: dict) -> str:
+    """Determine the API key to use (platform credits or BYOK)"""
     if request.use_platform_credits:
         api_key = PLATFORM_KEYS.get(config["provider"])
         if not api_key:
@@ -163,26 +348,399 @@ async def run_model(request: RunRequest):
         api_key = request.api_key
         if not api_key:
             raise HTTPException(status_code=400, detail="API key required")
+    return api_key
+
+# Default deadlines per request type; a model can override its own with "timeout" in MODEL_CONFIGS
+DEFAULT_TIMEOUTS = {
+    "text": float(os.getenv("TEXT_TIMEOUT", "60")),
+    "image": float(os.getenv("IMAGE_TIMEOUT", "120")),
+    "video": float(os.getenv("VIDEO_TIMEOUT", "900"))
+}
+
+# Platform credits charged per run by request type; a model can override its own with "credits" in MODEL_CONFIGS
+DEFAULT_CREDIT_COSTS = {"text": 1, "image": 2, "video": 5}
+
+# The app has no sign-in yet, so platform-credit runs without a user stay allowed (and unmetered) unless disabled
+ALLOW_ANONYMOUS_PLATFORM_CREDITS = os.getenv("ALLOW_ANONYMOUS_PLATFORM_CREDITS", "true").lower() in ("1", "true", "yes")
+
+# Outcomes of /api/run calls that never produced a result
+RUN_ABORTS = {"timeouts": 0, "client_disconnects": 0, "provider_busy": 0}
+
+def get_timeout(config: dict) -> float:
+    """Deadline in seconds for a call to this model"""
+    return config.get("timeout", DEFAULT_TIMEOUTS.get(config["type"], DEFAULT_TIMEOUTS["text"]))
+
+def get_credit_cost(config: dict) -> int:
+    """Platform credits charged for one run of this model"""
+    return config.get("credits", DEFAULT_CREDIT_COSTS.get(config["type"], DEFAULT_CREDIT_COSTS["text"]))
+
+def get_current_user_id() -> Optional[int]:
+    """The signed-in user billed for platform-credit runs
+    
+    Never taken from the request body, so a client can't bill another user.
+    Returns None until sign-in exists; override it (FastAPI dependency) then.
+    """
+    return None
+
+async def reserve_credits(request: RunRequest, config: dict, user_id: Optional[int]) -> Optional[Reservation]:
+    """Hold the run's platform credits for the signed-in user; raises InsufficientCredits
     
+    Placeholder results cost nothing, so nothing is reserved for them.
+    """
+    if not request.use_platform_credits or not calls_provider(config):
+        return None
+    if user_id is None:
+        if ALLOW_ANONYMOUS_PLATFORM_CREDITS:
+            return None
+        raise HTTPException(status_code=401, detail="Sign in to use platform credits",
+                            headers={"WWW-Authenticate": "Bearer"})
     try:
-        if config["type"] == "text":
-            return await handle_text_generation(request, config, api_key)
-        elif config["type"] == "image":
-            return await handle_image_generation(request, config, api_key)
-        elif config["type"] == "video":
-            return await handle_video_generation(request, config, api_key)
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported model type: {config['type']}")
-            
+        return await credit_ledger.reserve(user_id, get_credit_cost(config))
+    except UnknownUser as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+def settle_credits(reservation: Optional[Reservation], charge: bool):
+    """Commit a reservation if charge, refund it otherwise
+    
+    A reservation handed to a queued job is settled by the job when it finishes.
+    """
+    if reservation is None or reservation.deferred:
+        return
+    credit_ledger.settle(reservation, charge)
+
+def settle_run_credits(reservation: Optional[Reservation], result: Optional[RunResponse]):
+    """Settle each caller's own reservation by what that caller received
+    
+    Coalesced callers pay for the shared result like the caller that made
+    the upstream call (which may have left before it arrived); cached
+    results are free. A shared job charges its followers when it completes.
+    """
+    if reservation is None or reservation.deferred:
+        return
+    received = result is not None and result.success and not result.cached
+    if received and result.job_id:
+        if job_runner.add_on_finish(result.job_id, partial(credit_ledger.settle, reservation)):
+            reservation.deferred = True
+            return
+        received = False
+    credit_ledger.settle(reservation, received)
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before the result was ready"""
+
+async def run_until_disconnected(http_request: Request, work):
+    """Await work, cancelling it (and the upstream call inside it) if the client disconnects"""
+    work_task = asyncio.ensure_future(work)
+    
+    async def wait_for_disconnect():
+        # The body has already been read, so the next message is the disconnect
+        while True:
+            message = await http_request.receive()
+            if message["type"] == "http.disconnect":
+                return
+    
+    disconnect_task = asyncio.create_task(wait_for_disconnect())
+    try:
+        done, _ = await asyncio.wait({work_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        if work_task in done:
+            return work_task.result()
+        raise ClientDisconnected()
+    finally:
+        work_task.cancel()
+        disconnect_task.cancel()
+
+@app.post("/api/run", response_model=RunResponse)
+async def run_model(request: RunRequest, http_request: Request, response: Response,
+                    user_id: Optional[int] = Depends(get_current_user_id)):
+    """Execute a model with the given prompt"""
+    
+    config = get_model_config(request.model)
+    require_runnable(request.model, config)
+    api_key = resolve_api_key(request, config)
+    timeout = get_timeout(config)
+    
+    try:
+        reservation = await reserve_credits(request, config, user_id)
+    except InsufficientCredits as e:
+        response.status_code = 402
+        return RunResponse(success=False, error=str(e), error_type="insufficient_credits")
+    
+    result = None
+    try:
+        result = await run_until_disconnected(
+            http_request,
+            asyncio.wait_for(generate(request, config, api_key, reservation), timeout)
+        )
+        return result
+    
+    except asyncio.TimeoutError:
+        RUN_ABORTS["timeouts"] += 1
+        response.status_code = 504
+        return RunResponse(
+            success=False,
+            error=f"{request.model} did not respond within {timeout:g}s",
+            error_type="timeout"
+        )
+    except ProviderBusy as e:
+        RUN_ABORTS["provider_busy"] += 1
+        response.status_code = 503
+        return RunResponse(success=False, error=str(e), error_type="provider_busy")
+    except ClientDisconnected:
+        RUN_ABORTS["client_disconnects"] += 1
+        return RunResponse(success=False, error="Client disconnected", error_type="cancelled")
     except Exception as e:
         return RunResponse(
             success=False,
-            error=f"Generation failed: {str(e)}"
+            error=f"Generation failed: {str(e)}",
+            error_type="failed"
         )
+    finally:
+        settle_run_credits(reservation, result)
+
+async def generate(request: RunRequest, config: dict, api_key: str,
+                   reservation: Optional[Reservation] = None) -> RunResponse:
+    """Produce a result for a run request via the result cache, coalescing and the provider"""
+    # Identical platform-credit requests can be answered from the result cache
+    cache_key = run_cache.key_for(request, config)
+    if cache_key:
+        cached = run_cache.get(cache_key)
+        if cached is not None:
+            return cached.model_copy(update={"cached": True})
+    
+    async def produce() -> RunResponse:
+        # Cached once by whichever call runs, never as a coalesced copy
+        result = await dispatch_generation(request, config, api_key, reservation)
+        if cache_key:
+            run_cache.set(cache_key, result)
+        return result
+    
+    # Concurrent identical platform-credit requests share one upstream call
+    if request.use_platform_credits:
+        result, shared = await run_flights.do(("run", run_request_key(request)), produce)
+        if shared:
+            result = result.model_copy(update={"coalesced": True})
+    else:
+        result = await produce()
+    return result
+
+async def dispatch_generation(request: RunRequest, config: dict, api_key: str,
+                              reservation: Optional[Reservation] = None) -> RunResponse:
+    """Route a request to the handler for its model type"""
+    if config["type"] == "text":
+        return await handle_text_generation(request, config, api_key)
+    elif config["type"] == "image":
+        return await handle_image_generation(request, config, api_key, reservation)
+    elif config["type"] == "video":
+        return await handle_video_generation(request, config, api_key, reservation)
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported model type: {config['type']}")
+
+@app.post("/api/run/stream")
+async def run_model_stream(request: RunRequest, user_id: Optional[int] = Depends(get_current_user_id)):
+    """Execute a streaming text model, relaying tokens as server-sent events"""
+    config = get_model_config(request.model)
+    
+    if config["type"] != "text" or not config.get("supports_streaming"):
+        raise HTTPException(status_code=400, detail=f"Model {request.model} does not support streaming")
+    if config["provider"] not in STREAM_ADAPTERS:
+        raise HTTPException(status_code=400, detail=f"Streaming not implemented for {config['provider']}")
+    
+    api_key = resolve_api_key(request, config)
+    try:
+        reservation = await reserve_credits(request, config, user_id)
+    except InsufficientCredits as e:
+        raise HTTPException(status_code=402, detail=str(e))
+    
+    # Settled once the response is over, even if the client left before the stream started
+    outcome = {"charge": False}
+    return StreamingResponse(
+        stream_text_events(request, config, api_key, outcome),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(settle_stream_credits, reservation, outcome)
+    )
+
+async def settle_stream_credits(reservation: Optional[Reservation], outcome: dict):
+    settle_credits(reservation, outcome["charge"])
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a server-sent event frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+async def stream_text_events(request: RunRequest, config: dict, api_key: str, outcome: Optional[dict] = None):
+    """Relay provider token deltas as SSE frames, ending with a done or error event
+    
+    If the client disconnects, Starlette cancels this generator, which closes
+    the upstream provider response. outcome["charge"] is set once the stream
+    finishes, whether or not it was coalesced.
+    """
+    adapter = STREAM_ADAPTERS[config["provider"]]
+    coalesced = False
+    timeout = get_timeout(config)
+    deadline = asyncio.get_running_loop().time() + timeout
+    try:
+        if request.use_platform_credits:
+            # Identical concurrent platform-credit streams share one upstream stream
+            deltas, coalesced = stream_flights.join(
+                ("stream", run_request_key(request)),
+                lambda: adapter(request, config, api_key)
+            )
+        else:
+            deltas = adapter(request, config, api_key)
+        
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            try:
+                delta = await asyncio.wait_for(deltas.__anext__(), max(remaining, 0))
+            except StopAsyncIteration:
+                break
+            yield sse_event({"delta": delta})
+        if outcome is not None:
+            outcome["charge"] = True
+        yield sse_event({"model": request.model, "coalesced": coalesced}, event="done")
+    except asyncio.TimeoutError:
+        RUN_ABORTS["timeouts"] += 1
+        yield sse_event({"error": f"{request.model} did not finish within {timeout:g}s", "error_type": "timeout"}, event="error")
+    except ProviderBusy as e:
+        RUN_ABORTS["provider_busy"] += 1
+        yield sse_event({"error": str(e), "error_type": "provider_busy"}, event="error")
+    except Exception as e:
+        yield sse_event({"error": f"Generation failed: {str(e)}", "error_type": "failed"}, event="error")
+
+async def iter_sse_data(response: aiohttp.ClientResponse):
+    """Yield the data payload of each server-sent event in a provider response"""
+    async for raw_line in response.content:
+        line = raw_line.decode("utf-8").strip()
+        if line.startswith("data:"):
+            yield line[5:].strip()
+
+async def stream_chat_completions(request: RunRequest, config: dict, api_key: str, provider_name: str):
+    """Stream an OpenAI-compatible chat completions endpoint (OpenAI, xAI)"""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    messages = []
+    if request.system_prompt:
+        messages.append({"role": "system", "content": request.system_prompt})
+    messages.append({"role": "user", "content": request.prompt})
+    
+    data = {
+        "model": config["model_name"],
+        "messages": messages,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "stream": True
+    }
+    
+    async with provider_request(config["provider"], config["endpoint"], headers, data, estimate_tokens(request)) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            raise RuntimeError(f"{provider_name} API error: {error_text}")
+        
+        async for payload in iter_sse_data(response):
+            if payload == "[DONE]":
+                break
+            chunk = json.loads(payload)
+            if not chunk.get("choices"):
+                continue
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+async def stream_openai_text(request: RunRequest, config: dict, api_key: str):
+    """Stream OpenAI text API"""
+    async for delta in stream_chat_completions(request, config, api_key, "OpenAI"):
+        yield delta
+
+async def stream_xai_text(request: RunRequest, config: dict, api_key: str):
+    """Stream xAI text API"""
+    async for delta in stream_chat_completions(request, config, api_key, "xAI"):
+        yield delta
+
+async def stream_anthropic_text(request: RunRequest, config: dict, api_key: str):
+    """Stream Anthropic text API"""
+    headers = {
+        "x-api-key": api_key,
+        "Content-Type": "application/json",
+        "anthropic-version": "2023-06-01"
+    }
+    
+    data = {
+        "model": config["model_name"],
+        "max_tokens": request.max_tokens,
+        "temperature": request.temperature,
+        "messages": [{"role": "user", "content": request.prompt}],
+        "stream": True
+    }
+    
+    if request.system_prompt:
+        data["system"] = request.system_prompt
+    
+    async with provider_request(config["provider"], config["endpoint"], headers, data, estimate_tokens(request)) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            raise RuntimeError(f"Anthropic API error: {error_text}")
+        
+        async for payload in iter_sse_data(response):
+            event = json.loads(payload)
+            if event.get("type") == "content_block_delta":
+                delta = event.get("delta", {}).get("text")
+                if delta:
+                    yield delta
+            elif event.get("type") == "error":
+                raise RuntimeError(f"Anthropic API error: {event.get('error')}")
+            elif event.get("type") == "message_stop":
+                break
+
+# Streaming adapters by provider (models opt in via MODEL_CONFIGS["supports_streaming"])
+STREAM_ADAPTERS = {
+    "openai": stream_openai_text,
+    "anthropic": stream_anthropic_text,
+    "xai": stream_xai_text
+}
 
 async def handle_text_generation(request: RunRequest, config: dict, api_key: str) -> RunResponse:
-    """Handle text generation requests"""
+    """Handle text generation requests, hedging slow primaries when enabled"""
+    primary = timed(request.model, lambda: call_text_provider(request, config, api_key), run_succeeded)
+    result, _ = await hedger.run(
+        request.model, primary, build_hedge(request, config, api_key), run_succeeded
+    )
+    return result
+
+def run_succeeded(result: RunResponse) -> bool:
+    return result.success
+
+def build_hedge(request: RunRequest, config: dict, api_key: str):
+    """Backup call for a hedged request, or None if hedging would only add load
+    
+    Uses the model's hedge_fallback from MODEL_CONFIGS when platform credits
+    cover its provider, and otherwise duplicates the primary request.
+    """
+    fallback = config.get("hedge_fallback")
+    if fallback and request.use_platform_credits and PLATFORM_KEYS.get(MODEL_CONFIGS[fallback]["provider"]):
+        fallback_config = MODEL_CONFIGS[fallback]
+        fallback_request = request.model_copy(update={"model": fallback})
+        fallback_key = PLATFORM_KEYS[fallback_config["provider"]]
+        
+        async def call_fallback():
+            result = await call_text_provider(fallback_request, fallback_config, fallback_key)
+            return result.model_copy(update={"model": fallback})
+        
+        target_provider, call = fallback_config["provider"], timed(fallback, call_fallback, run_succeeded)
+    else:
+        target_provider = config["provider"]
+        call = timed(request.model, lambda: call_text_provider(request, config, api_key), run_succeeded)
     
+    # Don't pile hedges onto a provider that is already queueing
+    if provider_schedulers.get(target_provider).queued > 0:
+        return None
+    return call
+
+async def call_text_provider(request: RunRequest, config: dict, api_key: str) -> RunResponse:
+    """Call the text adapter for a model's provider"""
     if config["provider"] == "openai":
         return await call_openai_text(request, config, api_key)
     elif config["provider"] == "anthropic":
@@ -194,29 +752,47 @@ async def handle_text_generation(request: RunRequest, config: dict, api_key: str
     else:
         raise HTTPException(status_code=400, detail=f"Provider {config['provider']} not implemented")
 
-async def handle_image_generation(request: RunRequest, config: dict, api_key: str) -> RunResponse:
+async def handle_image_generation(request: RunRequest, config: dict, api_key: str,
+                                  reservation: Optional[Reservation] = None) -> RunResponse:
     """Handle image generation requests"""
-    
-    if config["provider"] == "openai":
-        return await call_openai_image(request, config, api_key)
-    else:
-        # For now, return a mock response for other providers
-        return RunResponse(
-            success=True,
-            image_url="https://via.placeholder.com/512x512/6366f1/ffffff?text=Generated+Image",
-            job_id=f"mock_job_{datetime.now().timestamp()}"
-        )
+    adapter = IMAGE_ADAPTERS.get(config["provider"])
+    if adapter:
+        return await adapter(request, config, api_key)
+    return await submit_job(request, config, lambda: call_placeholder_image(request, config, api_key), reservation)
 
-async def handle_video_generation(request: RunRequest, config: dict, api_key: str) -> RunResponse:
+async def handle_video_generation(request: RunRequest, config: dict, api_key: str,
+                                  reservation: Optional[Reservation] = None) -> RunResponse:
     """Handle video generation requests"""
+    adapter = VIDEO_ADAPTERS[config["provider"]]
+    return await submit_job(request, config, lambda: adapter(request, config, api_key), reservation)
+
+async def submit_job(request: RunRequest, config: dict, work,
+                     reservation: Optional[Reservation] = None) -> RunResponse:
+    """Queue a long-running generation on the job runner and return its job ID
+    
+    A credit reservation moves to the job: committed if it succeeds, refunded if it fails.
+    """
+    on_finish = partial(credit_ledger.settle, reservation) if reservation else None
+    try:
+        job_id = await job_runner.submit(request.model, config["type"], request.prompt, work,
+                                         timeout=get_timeout(config), on_finish=on_finish)
+    except JobQueueFull as e:
+        return RunResponse(success=False, error=str(e))
+    if reservation:
+        reservation.deferred = True
     
-    # For now, return a mock job ID for video generation
-    job_id = f"video_job_{datetime.now().timestamp()}"
     return RunResponse(
         success=True,
         job_id=job_id
     )
 
+async def call_placeholder_image(request: RunRequest, config: dict, api_key: str) -> dict:
+    """Mock image result until Seedream, Higgsfield and xAI image adapters exist"""
+    return {"image_url": "https://via.placeholder.com/512x512/6366f1/ffffff?text=Generated+Image"}
+
+# Video generation adapters by provider; video models on other providers are rejected by /api/run
+VIDEO_ADAPTERS = {}
+
 async def call_openai_text(request: RunRequest, config: dict, api_key: str) -> RunResponse:
     """Call OpenAI text API"""
     headers = {
@@ -237,20 +813,19 @@ async def call_openai_text(request: RunRequest, config: dict, api_key: str) -> R
         "stream": False
     }
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(config["endpoint"], headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                return RunResponse(
-                    success=True,
-                    response=result["choices"][0]["message"]["content"]
-                )
-            else:
-                error_text = await response.text()
-                return RunResponse(
-                    success=False,
-                    error=f"OpenAI API error: {error_text}"
-                )
+    async with provider_request(config["provider"], config["endpoint"], headers, data, estimate_tokens(request)) as response:
+        if response.status == 200:
+            result = await response.json()
+            return RunResponse(
+                success=True,
+                response=result["choices"][0]["message"]["content"]
+            )
+        else:
+            error_text = await response.text()
+            return RunResponse(
+                success=False,
+                error=f"OpenAI API error: {error_text}"
+            )
 
 async def call_anthropic_text(request: RunRequest, config: dict, api_key: str) -> RunResponse:
     """Call Anthropic text API"""
@@ -270,20 +845,19 @@ async def call_anthropic_text(request: RunRequest, config: dict, api_key: str) -
     if request.system_prompt:
         data["system"] = request.system_prompt
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(config["endpoint"], headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                return RunResponse(
-                    success=True,
-                    response=result["content"][0]["text"]
-                )
-            else:
-                error_text = await response.text()
-                return RunResponse(
-                    success=False,
-                    error=f"Anthropic API error: {error_text}"
-                )
+    async with provider_request(config["provider"], config["endpoint"], headers, data, estimate_tokens(request)) as response:
+        if response.status == 200:
+            result = await response.json()
+            return RunResponse(
+                success=True,
+                response=result["content"][0]["text"]
+            )
+        else:
+            error_text = await response.text()
+            return RunResponse(
+                success=False,
+                error=f"Anthropic API error: {error_text}"
+            )
 
 async def call_google_text(request: RunRequest, config: dict, api_key: str) -> RunResponse:
     """Call Google text API"""
@@ -303,20 +877,19 @@ async def call_google_text(request: RunRequest, config: dict, api_key: str) -> R
     
     url = f"{config['endpoint']}?key={api_key}"
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                return RunResponse(
-                    success=True,
-                    response=result["candidates"][0]["content"]["parts"][0]["text"]
-                )
-            else:
-                error_text = await response.text()
-                return RunResponse(
-                    success=False,
-                    error=f"Google API error: {error_text}"
-                )
+    async with provider_request(config["provider"], url, headers, data, estimate_tokens(request)) as response:
+        if response.status == 200:
+            result = await response.json()
+            return RunResponse(
+                success=True,
+                response=result["candidates"][0]["content"]["parts"][0]["text"]
+            )
+        else:
+            error_text = await response.text()
+            return RunResponse(
+                success=False,
+                error=f"Google API error: {error_text}"
+            )
 
 async def call_xai_text(request: RunRequest, config: dict, api_key: str) -> RunResponse:
     """Call xAI text API"""
@@ -338,20 +911,19 @@ async def call_xai_text(request: RunRequest, config: dict, api_key: str) -> RunR
         "stream": False
     }
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(config["endpoint"], headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                return RunResponse(
-                    success=True,
-                    response=result["choices"][0]["message"]["content"]
-                )
-            else:
-                error_text = await response.text()
-                return RunResponse(
-                    success=False,
-                    error=f"xAI API error: {error_text}"
-                )
+    async with provider_request(config["provider"], config["endpoint"], headers, data, estimate_tokens(request)) as response:
+        if response.status == 200:
+            result = await response.json()
+            return RunResponse(
+                success=True,
+                response=result["choices"][0]["message"]["content"]
+            )
+        else:
+            error_text = await response.text()
+            return RunResponse(
+                success=False,
+                error=f"xAI API error: {error_text}"
+            )
 
 async def call_openai_image(request: RunRequest, config: dict, api_key: str) -> RunResponse:
     """Call OpenAI image API"""
@@ -367,151 +939,635 @@ async def call_openai_image(request: RunRequest, config: dict, api_key: str) ->
         "size": "1024x1024"
     }
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(config["endpoint"], headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                return RunResponse(
-                    success=True,
-                    image_url=result["data"][0]["url"]
-                )
-            else:
-                error_text = await response.text()
-                return RunResponse(
-                    success=False,
-                    error=f"OpenAI Image API error: {error_text}"
-                )
+    async with provider_request(config["provider"], config["endpoint"], headers, data, estimate_tokens(request)) as response:
+        if response.status == 200:
+            result = await response.json()
+            return RunResponse(
+                success=True,
+                image_url=result["data"][0]["url"]
+            )
+        else:
+            error_text = await response.text()
+            return RunResponse(
+                success=False,
+                error=f"OpenAI Image API error: {error_text}"
+            )
+
+# Image generation adapters by provider; other image providers get a placeholder job
+IMAGE_ADAPTERS = {
+    "openai": call_openai_image
+}
+
+# Invalid lines reported back per ingest request (all of them are counted)
+MAX_REPORTED_ERRORS = 20
+
+@app.post("/api/metrics/ingest", dependencies=[Depends(require_scraper_token)])
+async def ingest_metrics(http_request: Request, response: Response):
+    """Ingest metric snapshots as NDJSON, one {prompt_id, provider, metric_date, counts} object per line
+    
+    Snapshots are buffered and upserted in batches shortly after the response.
+    If the buffer stays full the request stops with 503 and Retry-After;
+    "accepted" says how many lines got in, and re-sending them is harmless.
+    """
+    accepted = 0
+    rejected = 0
+    errors = []
+    line_number = 0
+    try:
+        async for line in iter_lines(http_request.stream()):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                snapshot = MetricSnapshot.model_validate_json(line)
+            except ValidationError as e:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_number, "error": str(e.errors()[0]["msg"])})
+                continue
+            await metrics_ingest.add(snapshot)
+            accepted += 1
+    except IngestBufferFull as e:
+        response.status_code = 503
+        response.headers["Retry-After"] = str(max(1, int(metrics_ingest.flush_interval)))
+        return {"accepted": accepted, "rejected": rejected, "errors": errors, "error": str(e)}
+    
+    return {"accepted": accepted, "rejected": rejected, "errors": errors}
 
 @app.get("/api/job/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+def get_job_status(job_id: str, db: Session = Depends(get_db)):
     """Get the status of an async job (for image/video generation)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
     
-    # For now, return mock status
-    # In production, this would check a database or queue system
-    if job_id.startswith("mock_job_"):
-        return JobStatusResponse(
-            job_id=job_id,
-            status="completed",
-            result={"image_url": "https://via.placeholder.com/512x512/6366f1/ffffff?text=Generated+Image"}
-        )
-    elif job_id.startswith("video_job_"):
-        return JobStatusResponse(
-            job_id=job_id,
-            status="processing"
-        )
-    else:
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        completed_at=job.completed_at
+    )
 
-@app.get("/api/prompts")
-def get_prompts(
+@app.get("/api/prompts", response_model=List[PromptSummary], response_class=ORJSONResponse)
+async def get_prompts(
+    request: Request,
     model: Optional[str] = None,
     output_type: Optional[str] = None,
+    tags: Optional[str] = None,
+    tag_match: str = "any",
     limit: int = 20,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get prompts with optional filtering by model and output type"""
-    query = db.query(Prompt)
+    """Get prompts with optional filtering by model, output type and tags
     
-    if model:
-        query = query.filter(Prompt.model == model)
+    tags is a comma-separated list; tag_match=any returns prompts with at
+    least one of them, tag_match=all only prompts with every one.
     
-    if output_type:
-        query = query.filter(Prompt.output_type == output_type)
-    
-    prompts = query.order_by(Prompt.created_at.desc()).limit(limit).all()
-    
-    return [
-        {
-            "id": prompt.id,
-            "title": prompt.title,
-            "model": prompt.model,
-            "output_type": prompt.output_type,
-            "tags": prompt.tags,
-            "source_url": prompt.source_url,
-            "attribution": prompt.attribution,
-            "image_url": prompt.image_url,
-            "created_at": prompt.created_at.isoformat(),
-            "author": prompt.user.username if prompt.user else "Admin",
-            "metrics": get_prompt_metrics(prompt.id, db)
-        }
-        for prompt in prompts
-    ]
+    Pages are keyset-paginated: pass the X-Next-Cursor header of one page as
+    ?cursor= to fetch the next one. Responses carry an ETag; a matching
+    If-None-Match gets a 304 after a version lookup of the page.
+    """
+    tag_list = parse_tags(tags)
+    stmt = filter_prompts(select(Prompt), model, output_type, tag_list, tag_match)
+    
+    return await send_versioned(
+        request,
+        ("prompts", model, output_type, tuple(tag_list), tag_match, limit, cursor),
+        lambda: fetch_feed_etag(stmt, limit, db, cursor),
+        lambda: build_feed_page(stmt, limit, db, cursor),
+        send_feed_page,
+        CACHE_CONTROL["feed"]
+    )
 
-@app.get("/api/prompts/{prompt_id}")
-def get_prompt(prompt_id: str, db: Session = Depends(get_db)):
-    """Get a specific prompt by ID"""
-    prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
+@app.get("/api/prompts/facets", response_model=PromptFacets, response_class=ORJSONResponse)
+async def get_prompt_facets(
+    model: Optional[str] = None,
+    output_type: Optional[str] = None,
+    tags: Optional[str] = None,
+    tag_match: str = "any",
+    tag_limit: int = 50,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get tag, model and output type counts for the prompts matching a filter
+    
+    Takes the same filters as /api/prompts. Counts are computed in one
+    query and kept in the read cache until prompts change.
+    """
+    tag_list = parse_tags(tags)
+    facets = await read_cache.aget_or_build(
+        ("prompts/facets", model, output_type, tuple(tag_list), tag_match),
+        lambda: build_facets(model, output_type, tag_list, tag_match, db)
+    )
+    return send_json(
+        {**facets, "tags": facets["tags"][:max(tag_limit, 0)]},
+        {"Cache-Control": CACHE_CONTROL["facets"]}
+    )
+
+@app.get("/api/prompts/search", response_model=List[SearchResult], response_class=ORJSONResponse)
+async def search_prompts(
+    request: Request,
+    q: str,
+    model: Optional[str] = None,
+    output_type: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search over prompt titles, tags and text, best matches first
+    
+    Accepts web-search syntax ("quoted phrases", OR, -excluded). Each result
+    carries a relevance rank and a snippet with matches wrapped in <mark>.
+    Paginate with the X-Next-Cursor header as for /api/prompts.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query is required")
+    
+    async def build():
+        return CachedBody(send_feed_page(await build_search_page(q, model, output_type, limit, db, cursor)))
+    
+    body = await read_cache.aget_or_build(("prompts/search", q, model, output_type, limit, cursor), build)
+    return body.respond(request.headers.get("accept-encoding"), {"Cache-Control": CACHE_CONTROL["search"]})
+
+@app.get("/api/prompts/trending", response_model=List[TrendingPrompt], response_class=ORJSONResponse)
+async def get_trending_prompts(
+    model: Optional[str] = None,
+    output_type: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get prompts ranked by recent, time-decayed growth in views, likes and shares
+    
+    Scores are recomputed in the background every TRENDING_REFRESH_INTERVAL
+    seconds; a request only slices the precomputed ranking and loads that
+    page. Paginate with the X-Next-Cursor header as for /api/prompts.
+    """
+    after = decode_score_cursor(cursor) if cursor else None
+    ranked = trending.page(limit, model, output_type, after)
+    
+    rows = await fetch_prompts_by_id([prompt_id for prompt_id, _ in ranked], db)
+    items = []
+    for prompt_id, score in ranked:
+        # Skip prompts deleted since the last refresh
+        if prompt_id in rows:
+            items.append({**serialize_prompt(rows[prompt_id]), "trending_score": score})
+    
+    next_cursor = pack_cursor([ranked[-1][1], ranked[-1][0]]) if ranked and len(ranked) >= limit else None
+    return send_feed_page((items, next_cursor), {"Cache-Control": CACHE_CONTROL["trending"]})
+
+@app.get("/api/prompts/{prompt_id}", response_model=PromptDetail, response_class=ORJSONResponse)
+async def get_prompt(prompt_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get a specific prompt by ID
     
-    if not prompt:
+    The ETag follows the prompt's row version and its metric rollup version,
+    so revalidating an unchanged prompt is one primary-key lookup.
+    """
+    return await send_versioned(
+        request,
+        ("prompt", prompt_id),
+        lambda: fetch_prompt_etag(prompt_id, db),
+        lambda: build_prompt_detail(prompt_id, db),
+        send_json,
+        CACHE_CONTROL["prompt"]
+    )
+
+async def fetch_prompt_etag(prompt_id: str, db: AsyncSession) -> Optional[str]:
+    """Current ETag of a prompt's detail, or None if it does not exist"""
+    totals = METRIC_TOTALS
+    result = await db.execute(
+        select(Prompt.id, Prompt.version, func.coalesce(totals.c.version, 0))
+        .outerjoin(totals, totals.c.prompt_id == Prompt.id)
+        .where(Prompt.id == prompt_id)
+    )
+    row = result.first()
+    return version_etag([tuple(row)]) if row else None
+
+async def build_prompt_detail(prompt_id: str, db: AsyncSession) -> tuple:
+    """Load a prompt with its text, author, metric totals and newest daily snapshot in one query
+    
+    Returns (detail, etag).
+    """
+    totals = METRIC_TOTALS
+    result = await db.execute(
+        select_list_rows(
+            Prompt.__table__,
+            Prompt.prompt_text,
+            totals.c.latest_metric_date,
+            *[totals.c[f"latest_{field}"] for field in METRIC_FIELDS]
+        ).where(Prompt.id == prompt_id)
+    )
+    row = result.first()
+    
+    if not row:
         raise HTTPException(status_code=404, detail="Prompt not found")
     
-    return {
-        "id": prompt.id,
-        "title": prompt.title,
-        "prompt_text": prompt.prompt_text,
-        "model": prompt.model,
-        "output_type": prompt.output_type,
-        "tags": prompt.tags,
-        "source_url": prompt.source_url,
-        "attribution": prompt.attribution,
-        "image_url": prompt.image_url,
-        "created_at": prompt.created_at.isoformat(),
-        "author": prompt.user.username if prompt.user else "Admin",
-        "metrics": get_prompt_metrics(prompt.id, db)
-    }
+    detail = serialize_prompt(row)
+    detail["latest_metrics"] = None
+    if row.latest_metric_date:
+        detail["latest_metrics"] = {
+            "metric_date": row.latest_metric_date,
+            **{field: getattr(row, f"latest_{field}") for field in METRIC_FIELDS}
+        }
+    detail["prompt_text"] = row.prompt_text
+    return detail, version_etag([(row.id, row.version, row.metrics_version)])
 
-@app.get("/api/models")
-def get_models(db: Session = Depends(get_db)):
+@app.get("/api/models", response_model=List[str], response_class=ORJSONResponse)
+async def get_models(db: AsyncSession = Depends(get_async_db)):
     """Get all available models"""
-    models = db.query(Prompt.model).distinct().all()
-    return [model[0] for model in models]
+    catalog = await get_model_catalog(db)
+    return send_json(
+        sorted(entry["model"] for entry in catalog if entry["prompt_count"] > 0),
+        {"Cache-Control": CACHE_CONTROL["models"]}
+    )
+
+@app.get("/api/models/catalog", response_model=List[ModelCatalogEntry], response_class=ORJSONResponse)
+async def get_models_catalog(db: AsyncSession = Depends(get_async_db)):
+    """Get every model with its prompt counts, latest activity and run capabilities"""
+    return send_json(await get_model_catalog(db), {"Cache-Control": CACHE_CONTROL["models"]})
 
-@app.get("/api/prompts/by-model/{model}")
-def get_prompts_by_model(
+def model_config_id(model: str) -> str:
+    """Map a prompt's display model name (e.g. 'Higgsfield AI') to its MODEL_CONFIGS key"""
+    return model.strip().lower().replace(" ", "-")
+
+async def get_model_catalog(db: AsyncSession) -> list:
+    return await read_cache.aget_or_build(("models/catalog",), lambda: build_model_catalog(db))
+
+async def build_model_catalog(db: AsyncSession) -> list:
+    """Merge the trigger-maintained model_catalog table with MODEL_CONFIGS
+    
+    model_catalog holds one small row per (model, output_type), so this never
+    touches the prompts table.
+    """
+    result = await db.execute(select(ModelCatalog))
+    
+    entries = {}
+    for row in result.scalars().all():
+        entry = entries.setdefault(row.model, {
+            "model": row.model,
+            "prompt_count": 0,
+            "output_types": {},
+            "latest_prompt_at": None
+        })
+        entry["prompt_count"] += row.prompt_count
+        if row.output_type:
+            entry["output_types"][row.output_type] = row.prompt_count
+        if row.latest_created_at and (entry["latest_prompt_at"] is None or row.latest_created_at > entry["latest_prompt_at"]):
+            entry["latest_prompt_at"] = row.latest_created_at
+    
+    # One entry per display model; several display names (e.g. "Veo-3" and "Veo 3") can share a config
+    configured = {model_config_id(model) for model in entries}
+    for config_id in MODEL_CONFIGS:
+        if config_id not in configured:
+            entries[config_id] = {
+                "model": config_id,
+                "prompt_count": 0,
+                "output_types": {},
+                "latest_prompt_at": None
+            }
+    
+    catalog = []
+    for model, entry in entries.items():
+        config_id = model_config_id(model)
+        config = MODEL_CONFIGS.get(config_id)
+        catalog.append({
+            **entry,
+            "runnable": config is not None and is_runnable(config),
+            "config_id": config_id if config else None,
+            "type": config["type"] if config else None,
+            "provider": config["provider"] if config else None,
+            "supports_streaming": config["supports_streaming"] if config else False
+        })
+    
+    catalog.sort(key=lambda entry: (-entry["prompt_count"], entry["model"]))
+    return catalog
+
+@app.get("/api/prompts/by-model/{model}", response_model=List[PromptSummary], response_class=ORJSONResponse)
+async def get_prompts_by_model(
+    request: Request,
     model: str,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get prompts for a specific model (for homepage carousel)"""
-    prompts = db.query(Prompt).filter(
-        Prompt.model == model
-    ).order_by(Prompt.created_at.desc()).limit(limit).all()
-    
-    return [
-        {
-            "id": prompt.id,
-            "title": prompt.title,
-            "model": prompt.model,
-            "output_type": prompt.output_type,
-            "tags": prompt.tags,
-            "source_url": prompt.source_url,
-            "attribution": prompt.attribution,
-            "image_url": prompt.image_url,
-            "created_at": prompt.created_at.isoformat(),
-            "author": prompt.user.username if prompt.user else "Admin",
-            "metrics": get_prompt_metrics(prompt.id, db)
-        }
-        for prompt in prompts
-    ]
+    stmt = select(Prompt).where(Prompt.model == model)
+    
+    return await send_versioned(
+        request,
+        ("prompts/by-model", model, limit, cursor),
+        lambda: fetch_feed_etag(stmt, limit, db, cursor),
+        lambda: build_feed_page(stmt, limit, db, cursor),
+        send_feed_page,
+        CACHE_CONTROL["feed"]
+    )
+
+METRIC_FIELDS = ("views", "likes", "shares", "comments")
+
+# Lifetime totals per prompt, kept up to date by triggers on prompt_metrics
+METRIC_TOTALS = PromptMetricRollup.__table__
+
+# Cache-Control per read route. Prompt detail and feed responses also carry
+# ETags, so once max-age runs out they revalidate for the cost of a version lookup
+CACHE_CONTROL = {
+    "prompt": "public, max-age=60",
+    "feed": "public, max-age=15",
+    "search": "public, max-age=60",
+    "trending": "public, max-age=60",
+    "facets": "public, max-age=300",
+    "models": "public, max-age=300"
+}
+
+# Prompt columns the list endpoints read. prompt_text (often a multi-KB JSON
+# spec) is only loaded for the detail endpoint, and the search document never is
+LIST_COLUMNS = [
+    column for column in Prompt.__table__.columns if column.key not in ("prompt_text", "search_vector")
+]
+
+def parse_tags(tags: Optional[str]) -> list:
+    """Split a comma-separated tags parameter, dropping blanks and duplicates"""
+    if not tags:
+        return []
+    return sorted({tag.strip() for tag in tags.split(",") if tag.strip()})
 
-def get_prompt_metrics(prompt_id: str, db: Session) -> dict:
-    """Get aggregated metrics for a prompt"""
-    metrics = db.query(PromptMetric).filter(
-        PromptMetric.prompt_id == prompt_id
-    ).all()
+def filter_prompts(stmt, model: Optional[str], output_type: Optional[str],
+                   tags: Optional[list] = None, tag_match: str = "any"):
+    """Apply the shared prompt filters to a select (tag filters use the GIN index on tags)"""
+    if model:
+        stmt = stmt.where(Prompt.model == model)
     
-    if not metrics:
-        return {"views": 0, "likes": 0, "shares": 0, "comments": 0}
+    if output_type:
+        stmt = stmt.where(Prompt.output_type == output_type)
     
-    # Aggregate metrics across all providers
-    total_views = sum(m.views or 0 for m in metrics)
-    total_likes = sum(m.likes or 0 for m in metrics)
-    total_shares = sum(m.shares or 0 for m in metrics)
-    total_comments = sum(m.comments or 0 for m in metrics)
+    if tags:
+        if tag_match == "any":
+            stmt = stmt.where(Prompt.tags.overlap(tags))
+        elif tag_match == "all":
+            stmt = stmt.where(Prompt.tags.contains(tags))
+        else:
+            raise HTTPException(status_code=400, detail="tag_match must be 'any' or 'all'")
+    
+    return stmt
+
+async def build_facets(model: Optional[str], output_type: Optional[str], tags: list,
+                       tag_match: str, db: AsyncSession) -> dict:
+    """Count matching prompts per tag, model and output type in a single query"""
+    matched = filter_prompts(
+        select(Prompt.model, Prompt.output_type, Prompt.tags), model, output_type, tags, tag_match
+    ).cte("matched")
+    tag = func.unnest(matched.c.tags).table_valued("value").render_derived(name="tag")
+    
+    counts = union_all(
+        select(literal("model").label("facet"), matched.c.model.label("value"), func.count().label("count"))
+            .group_by(matched.c.model),
+        select(literal("output_type"), matched.c.output_type, func.count())
+            .group_by(matched.c.output_type),
+        select(literal("tag"), tag.c.value, func.count())
+            .select_from(matched).join(tag, true())
+            .group_by(tag.c.value)
+    )
+    result = await db.execute(counts)
+    
+    facets = {"model": [], "output_type": [], "tag": []}
+    for facet, value, count in result.all():
+        if value is not None:
+            facets[facet].append({"value": value, "count": count})
+    for values in facets.values():
+        values.sort(key=lambda entry: (-entry["count"], entry["value"]))
     
     return {
-        "views": total_views,
-        "likes": total_likes,
-        "shares": total_shares,
-        "comments": total_comments
+        "total": sum(entry["count"] for entry in facets["model"]),
+        "models": facets["model"],
+        "output_types": facets["output_type"],
+        "tags": facets["tag"]
     }
+
+def select_list_rows(prompts, *extra_columns):
+    """Select slim prompt rows from prompts (the prompts table or a page CTE of LIST_COLUMNS)
+    
+    Rows carry the list columns, the author's username and the metric totals
+    and version from the rollup, so no ORM objects or per-page user lookups
+    are needed.
+    """
+    totals = METRIC_TOTALS
+    return select(
+        *[prompts.c[column.key] for column in LIST_COLUMNS],
+        User.username.label("author"),
+        *[func.coalesce(totals.c[field], 0).label(field) for field in METRIC_FIELDS],
+        func.coalesce(totals.c.version, 0).label("metrics_version"),
+        *extra_columns
+    ).select_from(prompts).outerjoin(
+        User, User.id == prompts.c.submitted_by
+    ).outerjoin(
+        totals, totals.c.prompt_id == prompts.c.id
+    )
+
+def serialize_prompt(row) -> dict:
+    """Build the API representation of a row from select_list_rows (without prompt_text)"""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "model": row.model,
+        "output_type": row.output_type,
+        "tags": row.tags,
+        "source_url": row.source_url,
+        "attribution": row.attribution,
+        "image_url": row.image_url,
+        "created_at": row.created_at,
+        "author": row.author or "Admin",
+        "metrics": {field: int(getattr(row, field)) for field in METRIC_FIELDS}
+    }
+
+def pack_cursor(position: list) -> str:
+    """Encode a keyset position as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii").rstrip("=")
+
+def unpack_cursor(cursor: str) -> list:
+    """Decode a cursor produced by pack_cursor"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+def encode_cursor(row) -> str:
+    """Encode a row's (created_at, id) keyset position as an opaque cursor"""
+    return pack_cursor([row.created_at.isoformat(), row.id])
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        created_at, prompt_id = unpack_cursor(cursor)
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # prompts.created_at is TIMESTAMPTZ; cursors issued while it was TIMESTAMP are naive UTC
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, str(prompt_id)
+
+def decode_score_cursor(cursor: str) -> tuple:
+    """Decode a (score, id) cursor from search or trending results"""
+    try:
+        rank, prompt_id = unpack_cursor(cursor)
+        return float(rank), str(prompt_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def build_feed_page(stmt, limit: int, db: AsyncSession, cursor: Optional[str] = None) -> tuple:
+    """Serialize a feed page, returning ((items, next_cursor), etag)"""
+    rows = await fetch_prompt_page(stmt, limit, db, cursor)
+    # Only a full page can have a next page
+    next_cursor = encode_cursor(rows[-1]) if rows and len(rows) >= limit else None
+    etag = version_etag([(row.id, row.version, row.metrics_version) for row in rows])
+    return ([serialize_prompt(row) for row in rows], next_cursor), etag
+
+def feed_page_cte(stmt, limit: int, cursor: Optional[str], columns: list):
+    """Select one keyset page of a prompt feed (newest first) as a CTE"""
+    if cursor:
+        created_at, prompt_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Prompt.created_at, Prompt.id) < tuple_(created_at, prompt_id))
+    
+    return stmt.with_only_columns(*columns).order_by(
+        Prompt.created_at.desc(), Prompt.id.desc()
+    ).limit(limit).cte("page")
+
+async def fetch_feed_etag(stmt, limit: int, db: AsyncSession, cursor: Optional[str] = None) -> str:
+    """Current ETag of a feed page, from just the IDs and versions of its rows"""
+    page = feed_page_cte(stmt, limit, cursor, [Prompt.id, Prompt.version, Prompt.created_at])
+    totals = METRIC_TOTALS
+    result = await db.execute(
+        select(page.c.id, page.c.version, func.coalesce(totals.c.version, 0))
+        .outerjoin(totals, totals.c.prompt_id == page.c.id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    return version_etag(result.all())
+
+def send_json(content, headers: Optional[dict] = None) -> ORJSONResponse:
+    """Render a read endpoint's content with orjson
+    
+    Content is already shaped like the route's response_model, so returning
+    the response directly skips FastAPI's validation and jsonable_encoder
+    pass; orjson encodes datetimes and dates natively.
+    """
+    return ORJSONResponse(content, headers=headers)
+
+def send_feed_page(page: tuple, headers: Optional[dict] = None) -> ORJSONResponse:
+    """Render a feed page's items, exposing its next cursor as a header"""
+    items, next_cursor = page
+    headers = dict(headers or {})
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return send_json(items, headers)
+
+def version_etag(versions: list) -> str:
+    """Strong ETag for a response built from rows with the given (id, version, metrics_version)"""
+    digest = hashlib.blake2b(repr([tuple(row) for row in versions]).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+def match_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """Return the If-None-Match entry matching any encoding of etag (weak comparison, per RFC 9110)"""
+    if if_none_match.strip() == "*":
+        return etag
+    variants = etag_variants(etag)
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag in variants:
+            return tag
+    return None
+
+async def send_versioned(request: Request, key: tuple, fetch_etag, build, render, cache_control: str) -> Response:
+    """Serve a read-cached response with an ETag, or 304 if the client's copy is current
+    
+    build returns (content, etag); the rendered body is kept in the read
+    cache along with its compressed variants. Only requests with
+    If-None-Match pay for fetch_etag, a version lookup that never builds the
+    body; a cached body whose ETag no longer matches the database is rebuilt.
+    """
+    headers = {"Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    current_etag = None
+    if if_none_match:
+        current_etag = await fetch_etag()
+        matched = current_etag and match_etag(if_none_match, current_etag)
+        if matched:
+            return Response(status_code=304, headers={**headers, "ETag": matched, "Vary": "Accept-Encoding"})
+    
+    entry = read_cache.get(key)
+    if entry is None or (current_etag and entry[1] != current_etag):
+        content, etag = await build()
+        entry = (CachedBody(render(content)), etag)
+        read_cache.set(key, entry)
+    body, etag = entry
+    return body.respond(request.headers.get("accept-encoding"), {**headers, "ETag": etag})
+
+async def fetch_prompt_page(stmt, limit: int, db: AsyncSession, cursor: Optional[str] = None) -> list:
+    """Fetch a page of slim prompt rows with their metric totals in a single query
+    
+    The page is selected first (newest first, keyset-paginated on
+    (created_at, id) so every page is an index range scan), then joined to
+    authors and the per-prompt metric rollup by primary key.
+    """
+    page = feed_page_cte(stmt, limit, cursor, LIST_COLUMNS)
+    
+    result = await db.execute(
+        select_list_rows(page).order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    return result.all()
+
+async def fetch_prompts_by_id(prompt_ids: list, db: AsyncSession) -> dict:
+    """Load slim rows for the given prompts with their metric totals in one query, keyed by ID"""
+    if not prompt_ids:
+        return {}
+    
+    result = await db.execute(
+        select_list_rows(Prompt.__table__).where(Prompt.id.in_(prompt_ids))
+    )
+    return {row.id: row for row in result.all()}
+
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter=\" ... \""
+
+async def build_search_page(q: str, model: Optional[str], output_type: Optional[str], limit: int,
+                            db: AsyncSession, cursor: Optional[str] = None) -> tuple:
+    """Serialize a page of search results, returning (items, next_cursor)
+    
+    Matches come from the GIN index on search_vector and are keyset-paginated
+    on (rank, id). Snippets are only generated for the rows on the page.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Prompt.search_vector, query)
+    
+    stmt = filter_prompts(
+        select(Prompt.id, rank.label("rank")).where(Prompt.search_vector.op("@@")(query)),
+        model, output_type
+    )
+    if cursor:
+        cursor_rank, prompt_id = decode_score_cursor(cursor)
+        stmt = stmt.where(tuple_(rank, Prompt.id) < tuple_(cursor_rank, prompt_id))
+    
+    page = stmt.order_by(rank.desc(), Prompt.id.desc()).limit(limit).cte("page")
+    
+    # prompt_text is only read inside Postgres, to build the snippet
+    result = await db.execute(
+        select_list_rows(
+            Prompt.__table__,
+            page.c.rank,
+            func.ts_headline(SEARCH_CONFIG, Prompt.prompt_text, query, SNIPPET_OPTIONS).label("snippet")
+        ).join(
+            page, page.c.id == Prompt.id
+        ).order_by(page.c.rank.desc(), Prompt.id.desc())
+    )
+    rows = result.all()
+    
+    items = []
+    for row in rows:
+        item = serialize_prompt(row)
+        item["rank"] = row.rank
+        item["snippet"] = row.snippet
+        items.append(item)
+    
+    next_cursor = pack_cursor([rows[-1].rank, rows[-1].id]) if rows and len(rows) >= limit else None
+    return items, next_cursor
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Manage the monthly partitions of prompt_metrics
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.append(str(backend_dir))
+
+from database import engine
+from sqlalchemy import text
+
+def month_start(day: date, offset: int = 0) -> date:
+    """First day of the month offset months after day's month"""
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+def list_partitions(conn):
+    """(name, bounds, estimated rows) for every partition of prompt_metrics, oldest first"""
+    return conn.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples::bigint
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'prompt_metrics'::regclass
+        ORDER BY child.relname
+    """)).all()
+
+def ensure_partitions(months_ahead: int):
+    """Create partitions for the current month and the next months_ahead months"""
+    today = date.today()
+    with engine.begin() as conn:
+        for offset in range(months_ahead + 1):
+            month = month_start(today, offset)
+            conn.execute(text("SELECT create_prompt_metrics_partition(:month)"), {"month": month})
+            print(f"✅ prompt_metrics_{month:%Y_%m}")
+
+def detach_partitions(before: date, drop: bool = False):
+    """Detach (and optionally drop) monthly partitions that end on or before a date
+
+    Rollup totals are not reduced: detaching bypasses the row triggers, so
+    lifetime totals still include the detached months.
+    """
+    with engine.begin() as conn:
+        for name, bounds, _ in list_partitions(conn):
+            if not name.startswith("prompt_metrics_") or name == "prompt_metrics_default":
+                continue
+            try:
+                year, month = (int(part) for part in name.rsplit("_", 2)[1:])
+            except ValueError:
+                continue
+            if month_start(date(year, month, 1), 1) > before:
+                continue
+            conn.execute(text(f'ALTER TABLE prompt_metrics DETACH PARTITION "{name}"'))
+            if drop:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+                print(f"🗑️  Dropped {name}")
+            else:
+                print(f"📦 Detached {name} (still queryable as a standalone table)")
+
+def print_partitions():
+    with engine.connect() as conn:
+        for name, bounds, rows in list_partitions(conn):
+            print(f"{name:<28} {bounds:<60} ~{max(rows, 0):,} rows")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of prompt_metrics")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="create partitions for the current and upcoming months")
+    ensure.add_argument("--months-ahead", type=int, default=2,
+                        help="months past the current one to create (default 2)")
+
+    detach = commands.add_parser("detach", help="detach partitions that end on or before a date")
+    detach.add_argument("--before", type=date.fromisoformat, required=True,
+                        help="YYYY-MM-DD; partitions whose month ends on or before this date are detached")
+    detach.add_argument("--drop", action="store_true", help="drop the detached partitions")
+
+    commands.add_parser("list", help="list partitions with their bounds and estimated row counts")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        ensure_partitions(args.months_ahead)
+    elif args.command == "detach":
+        detach_partitions(args.before, args.drop)
+    else:
+        print_partitions()
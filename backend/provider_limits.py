@@ -0,0 +1,228 @@
+"""
+Per-provider outbound scheduling: RPM/TPM token buckets, in-flight limits and rate-aware retry
+"""
+
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from http_client import http_pool, provider_setting
+
+# Defaults apply to every provider and can be overridden per provider,
+# e.g. PROVIDER_RPM_OPENAI=500. A limit of 0 means unlimited.
+PROVIDER_RPM = int(os.getenv("PROVIDER_RPM", "0"))
+PROVIDER_TPM = int(os.getenv("PROVIDER_TPM", "0"))
+PROVIDER_MAX_CONCURRENCY = int(os.getenv("PROVIDER_MAX_CONCURRENCY", "0"))
+# How long a request may wait in the provider queue (including retries) before giving up
+PROVIDER_QUEUE_TIMEOUT = float(os.getenv("PROVIDER_QUEUE_TIMEOUT", "30"))
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+PROVIDER_BACKOFF_BASE = float(os.getenv("PROVIDER_BACKOFF_BASE", "0.5"))
+PROVIDER_BACKOFF_MAX = float(os.getenv("PROVIDER_BACKOFF_MAX", "20"))
+
+# 529 is Anthropic's "overloaded"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504, 529}
+
+class ProviderBusy(Exception):
+    """Raised when a request cannot be scheduled on a provider before its deadline"""
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of budget"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be consumed (0 if available now)"""
+        self._refill()
+        # Requests larger than the whole bucket are allowed once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+class ProviderScheduler:
+    """Admission control for one provider"""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        rpm = provider_setting("PROVIDER_RPM", provider, PROVIDER_RPM)
+        tpm = provider_setting("PROVIDER_TPM", provider, PROVIDER_TPM)
+        max_concurrency = provider_setting("PROVIDER_MAX_CONCURRENCY", provider, PROVIDER_MAX_CONCURRENCY)
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.max_concurrency = max_concurrency
+        self.paused_until = 0.0
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def pause(self, seconds: float):
+        """Hold back every request to this provider, e.g. after a 429 with Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _wait_time(self, tokens: int) -> float:
+        waits = [self.paused_until - time.monotonic()]
+        if self.requests:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens:
+            waits.append(self.tokens.wait_time(tokens))
+        return max(0.0, *waits)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, deadline: float):
+        """Wait for rate budget and an in-flight slot, or raise ProviderBusy at the deadline"""
+        self.queued += 1
+        acquired = False
+        try:
+            if self.semaphore:
+                remaining = deadline - time.monotonic()
+                try:
+                    await asyncio.wait_for(self.semaphore.acquire(), timeout=max(remaining, 0))
+                except asyncio.TimeoutError:
+                    self._reject()
+                acquired = True
+
+            while True:
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                if time.monotonic() + wait > deadline:
+                    self._reject()
+                await asyncio.sleep(wait)
+
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(tokens)
+        except BaseException:
+            if acquired:
+                self.semaphore.release()
+            raise
+        finally:
+            self.queued -= 1
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self.semaphore:
+                self.semaphore.release()
+
+    def _reject(self):
+        self.rejected += 1
+        raise ProviderBusy(f"{self.provider} is at capacity, try again later")
+
+    def get_stats(self) -> dict:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency or None,
+            "rpm": int(self.requests.capacity) if self.requests else None,
+            "tpm": int(self.tokens.capacity) if self.tokens else None,
+            "paused_for": max(0.0, self.paused_until - time.monotonic()),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries
+        }
+
+class ProviderSchedulers:
+    def __init__(self):
+        self.schedulers: Dict[str, ProviderScheduler] = {}
+
+    def get(self, provider: str) -> ProviderScheduler:
+        scheduler = self.schedulers.get(provider)
+        if scheduler is None:
+            scheduler = self.schedulers[provider] = ProviderScheduler(provider)
+        return scheduler
+
+    def get_stats(self) -> dict:
+        return {name: scheduler.get_stats() for name, scheduler in self.schedulers.items()}
+
+provider_schedulers = ProviderSchedulers()
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from Retry-After (seconds or HTTP date) or retry-after-ms"""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, retry_after: Optional[float]) -> float:
+    """Jittered delay before the next attempt, honoring the server's Retry-After"""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, min(1.0, retry_after * 0.1) + 0.05)
+    # Full jitter exponential backoff
+    return random.uniform(0, min(PROVIDER_BACKOFF_MAX, PROVIDER_BACKOFF_BASE * 2 ** attempt))
+
+def estimate_tokens(request) -> int:
+    """Rough token cost of a request for TPM budgeting (~4 characters per token)"""
+    prompt_chars = len(request.prompt) + len(request.system_prompt or "")
+    return prompt_chars // 4 + (request.max_tokens or 0)
+
+@asynccontextmanager
+async def provider_request(provider: str, url: str, headers: dict, data: dict, tokens: int):
+    """POST to a provider under its scheduler, retrying rate-limited and transient failures
+
+    Yields the aiohttp response of the final attempt, which is either a
+    success, a non-retryable error, or the last retryable error once retries
+    or the queue deadline run out.
+    """
+    scheduler = provider_schedulers.get(provider)
+    session = http_pool.get_session(provider)
+    deadline = time.monotonic() + PROVIDER_QUEUE_TIMEOUT
+    attempt = 0
+
+    while True:
+        async with scheduler.slot(tokens, deadline):
+            async with session.post(url, headers=headers, json=data) as response:
+                if response.status not in RETRYABLE_STATUSES or attempt >= PROVIDER_MAX_RETRIES:
+                    yield response
+                    return
+
+                retry_after = parse_retry_after(response.headers)
+                delay = backoff_delay(attempt, retry_after)
+                if response.status == 429:
+                    scheduler.rate_limited += 1
+                    scheduler.pause(delay)
+                if time.monotonic() + delay > deadline:
+                    yield response
+                    return
+
+        scheduler.retries += 1
+        attempt += 1
+        await asyncio.sleep(delay)
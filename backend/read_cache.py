@@ -0,0 +1,142 @@
+"""
+In-process TTL + LRU cache for read endpoints, invalidated on catalog writes
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "60"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "1024"))
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, max_entries: int = READ_CACHE_MAX_ENTRIES, ttl: float = READ_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable):
+        """Return the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(self, key: Hashable, build: Callable):
+        """Return the cached value for key, building and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value)
+        return value
+
+    async def aget_or_build(self, key: Hashable, build: Callable):
+        """Async variant of get_or_build for coroutine builders"""
+        value = self.get(key)
+        if value is None:
+            value = await build()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def invalidate(self, namespaces: Iterable[str] = (), keys: Iterable[Hashable] = ()):
+        """Drop the entries whose key starts with one of namespaces, plus the exact keys given"""
+        namespaces = set(namespaces)
+        with self._lock:
+            stale = [key for key in self._entries if isinstance(key, tuple) and key and key[0] in namespaces]
+            stale.extend(key for key in keys if key in self._entries)
+            for key in stale:
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+def invalidate_on_writes(cache: TTLCache, table_names: Iterable[str]):
+    """Clear the cache whenever a session commits a write to one of the given tables
+
+    Covers ORM unit-of-work flushes as well as insert/update/delete statements
+    run through Session.execute (bulk upserts). Writers in other processes
+    (e.g. import_data.py) are only picked up once entries expire after the TTL.
+    """
+    watched = set(table_names)
+
+    def mark_dirty(session):
+        session.info["read_cache_dirty"] = True
+
+    @event.listens_for(Session, "after_flush")
+    def after_flush(session, flush_context):
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            table = getattr(instance, "__table__", None)
+            if table is not None and table.name in watched:
+                mark_dirty(session)
+                return
+
+    @event.listens_for(Session, "do_orm_execute")
+    def do_orm_execute(orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and getattr(table, "name", None) in watched:
+            mark_dirty(orm_execute_state.session)
+
+    @event.listens_for(Session, "after_commit")
+    def after_commit(session):
+        if session.info.pop("read_cache_dirty", False):
+            cache.clear()
+
+    @event.listens_for(Session, "after_rollback")
+    def after_rollback(session):
+        session.info.pop("read_cache_dirty", None)
+
+# Shared cache for the catalog read endpoints in main.py
+read_cache = TTLCache()
+
+# Key namespaces in main.py whose responses list prompts with their metric totals;
+# prompt details are keyed ("prompt", prompt_id). Facets and the model catalog don't carry metrics.
+METRIC_NAMESPACES = ("prompts", "prompts/by-model", "prompts/search")
+invalidate_on_writes(read_cache, ["prompts", "prompt_metrics"])
@@ -0,0 +1,122 @@
+"""
+Exact-match result cache for platform-credit /api/run calls
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+RUN_CACHE_ENABLED = os.getenv("RUN_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RUN_CACHE_TTL = float(os.getenv("RUN_CACHE_TTL", "3600"))
+RUN_CACHE_MAX_BYTES = int(os.getenv("RUN_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Sampling above this temperature is too random for replaying one result to be reasonable
+RUN_CACHE_MAX_TEMPERATURE = float(os.getenv("RUN_CACHE_MAX_TEMPERATURE", "0.7"))
+
+def normalize_run_request(request) -> dict:
+    """The fields of a RunRequest that determine its output (never the api_key)"""
+    return {
+        "model": request.model,
+        "prompt": request.prompt.strip(),
+        "system_prompt": (request.system_prompt or "").strip(),
+        "temperature": round(request.temperature, 3) if request.temperature is not None else None,
+        "max_tokens": request.max_tokens
+    }
+
+def run_request_key(request) -> str:
+    """Stable hash of the normalized request"""
+    payload = json.dumps(normalize_run_request(request), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class RunResultCache:
+    """LRU cache of RunResponses bounded by total byte size, with a TTL per entry"""
+
+    def __init__(self, enabled: bool = RUN_CACHE_ENABLED, ttl: float = RUN_CACHE_TTL,
+                 max_bytes: int = RUN_CACHE_MAX_BYTES, max_temperature: float = RUN_CACHE_MAX_TEMPERATURE):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+        self._entries = OrderedDict()  # key -> (expires_at, size, response)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0
+
+    def key_for(self, request, config: dict) -> Optional[str]:
+        """Cache key for a request, or None if this request must not be cached"""
+        if not self.enabled or not request.use_platform_credits:
+            return None
+        if config["type"] not in ("text", "image"):
+            return None
+        if config["type"] == "text" and (request.temperature or 0) > self.max_temperature:
+            with self._lock:
+                self.skipped += 1
+            return None
+        return run_request_key(request)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, response = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def set(self, key: str, response):
+        """Store a successful text or image result"""
+        if not response.success or response.job_id or not (response.response or response.image_url):
+            return
+        size = len(response.model_dump_json())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, response)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "max_temperature": self.max_temperature,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "skipped_high_temperature": self.skipped
+            }
+
+# Shared cache for run_model in main.py
+run_cache = RunResultCache()
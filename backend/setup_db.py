@@ -34,7 +34,7 @@ def setup_database():
                 SELECT table_name 
                 FROM information_schema.tables 
                 WHERE table_schema = 'public' 
-                AND table_name IN ('users', 'prompts', 'prompt_metrics')
+                AND table_name IN ('users', 'prompts', 'prompt_metrics', 'prompt_metric_rollups', 'model_catalog', 'jobs')
                 ORDER BY table_name
             """))
             tables = [row[0] for row in result.fetchall()]
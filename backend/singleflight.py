@@ -0,0 +1,144 @@
+"""
+Request coalescing: concurrent identical /api/run calls share one upstream call
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """Deduplicate concurrent calls by key; every waiter gets the leader's result
+
+    The shared call runs as its own task, so one client disconnecting does not
+    cancel it for the others. It is only cancelled once every waiter is gone.
+    """
+
+    def __init__(self):
+        self.flights: Dict[Hashable, asyncio.Task] = {}
+        self.waiters: Dict[Hashable, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """Run factory() once per key at a time, returning (result, shared)"""
+        task = self.flights.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.create_task(factory())
+            self.flights[key] = task
+            self.waiters[key] = 0
+            task.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if not task.done() and self.waiters.get(key) == 1:
+                task.cancel()
+            raise
+        finally:
+            if self.flights.get(key) is task:
+                self.waiters[key] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self.flights.get(key) is task:
+            del self.flights[key]
+            del self.waiters[key]
+
+    def get_stats(self) -> dict:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self.flights),
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0
+        }
+
+class _Broadcast:
+    """Chunks produced so far by one upstream stream, replayed to every subscriber"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task = None
+
+class StreamFlight:
+    """Single-flight for streaming calls
+
+    One pump task reads the upstream stream into a shared buffer; subscribers
+    that join late first replay what has already arrived, then follow live.
+    """
+
+    def __init__(self):
+        self.flights: Dict[Hashable, _Broadcast] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def join(self, key: Hashable, factory: Callable[[], AsyncIterator]) -> Tuple[AsyncIterator, bool]:
+        """Subscribe to the stream for key, starting it if needed; returns (chunks, shared)"""
+        flight = self.flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            flight = _Broadcast()
+            self.flights[key] = flight
+            flight.task = asyncio.create_task(self._pump(key, flight, factory))
+        flight.subscribers += 1
+        return self._follow(flight), shared
+
+    async def _pump(self, key: Hashable, flight: _Broadcast, factory: Callable[[], AsyncIterator]):
+        try:
+            async for chunk in factory():
+                async with flight.changed:
+                    flight.chunks.append(chunk)
+                    flight.changed.notify_all()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+        except Exception as e:
+            flight.error = e
+        finally:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def _follow(self, flight: _Broadcast):
+        index = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: index < len(flight.chunks) or flight.done)
+                    pending = flight.chunks[index:]
+                    done = flight.done
+                index += len(pending)
+                for chunk in pending:
+                    yield chunk
+                if done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def get_stats(self) -> dict:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self.flights),
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0
+        }
+
+# Shared coalescers for run_model / run_model_stream in main.py
+run_flights = SingleFlight()
+stream_flights = StreamFlight()
@@ -0,0 +1,69 @@
+"""
+Shared fixtures for the API tests, which run against the database in DATABASE_URL
+"""
+
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+
+from database import engine, create_tables, SessionLocal, Prompt, PromptMetric, PromptMetricRollup
+from read_cache import read_cache
+from trending import trending
+
+TEST_MODEL = "Test-Model"
+
+@pytest.fixture(scope="session")
+def client():
+    """App client with the lifespan running, once the startup trending refresh is done"""
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as e:
+        pytest.skip(f"Database not available: {e}")
+    create_tables()
+
+    import main
+    with TestClient(main.app) as client:
+        # Keep the startup refresh's queries out of the tests' query counts
+        deadline = time.monotonic() + 10
+        while trending.refreshed_at is None and trending.last_error is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        yield client
+
+@pytest.fixture
+def prompts(client):
+    """Three throwaway prompts for TEST_MODEL, each with one day of metrics; newest first"""
+    now = datetime.utcnow()
+    ids = [f"test-prompt-{i}" for i in range(3)]
+    with SessionLocal() as db:
+        for i, prompt_id in enumerate(ids):
+            db.add(Prompt(
+                id=prompt_id, title=f"Test prompt {i}", prompt_text=f"Prompt text {i}", model=TEST_MODEL,
+                output_type="video", tags=["test"], created_at=now - timedelta(minutes=i)
+            ))
+            db.add(PromptMetric(
+                prompt_id=prompt_id, provider="instagram", metric_date=date.today(),
+                views=100, likes=10, shares=1, comments=1
+            ))
+        db.commit()
+    read_cache.clear()
+
+    yield ids
+
+    with SessionLocal() as db:
+        db.execute(delete(PromptMetric).where(PromptMetric.prompt_id.in_(ids)))
+        db.execute(delete(PromptMetricRollup).where(PromptMetricRollup.prompt_id.in_(ids)))
+        db.execute(delete(Prompt).where(Prompt.id.in_(ids)))
+        db.commit()
+    read_cache.clear()
@@ -0,0 +1,38 @@
+"""
+Coalesced /api/run callers: one cache write, and each caller settles its own credits
+"""
+
+import asyncio
+
+import main
+from credits import CreditLedger, Account
+from run_cache import RunResultCache
+
+def test_only_the_upstream_call_is_cached_and_every_caller_pays(monkeypatch):
+    cache = RunResultCache(enabled=True)
+    ledger = CreditLedger()
+    ledger.accounts[1] = Account(10)
+    monkeypatch.setattr(main, "run_cache", cache)
+    monkeypatch.setattr(main, "credit_ledger", ledger)
+
+    async def dispatch(request, config, api_key, reservation=None):
+        await asyncio.sleep(0.05)
+        return main.RunResponse(success=True, response="shared answer")
+    monkeypatch.setattr(main, "dispatch_generation", dispatch)
+
+    request = main.RunRequest(model="gpt-4o", prompt="Hi", temperature=0, use_platform_credits=True)
+    config = main.MODEL_CONFIGS["gpt-4o"]
+
+    async def caller():
+        reservation = await ledger.reserve(1, 1)
+        result = await main.generate(request, config, "key", reservation)
+        main.settle_run_credits(reservation, result)
+        return result
+
+    async def run():
+        return await asyncio.gather(caller(), caller(), caller())
+
+    results = asyncio.run(run())
+    assert sorted(result.coalesced for result in results) == [False, True, True]
+    assert cache.get(main.run_request_key(request)).coalesced is False
+    assert ledger.commits == 3 and ledger.accounts[1].reserved == 0
@@ -0,0 +1,81 @@
+"""
+Platform-credit runs are billed to the signed-in user, never one named by the client
+"""
+
+import json
+
+import pytest
+from sqlalchemy import delete
+
+import main
+from credits import credit_ledger, InsufficientCredits
+from database import SessionLocal, User
+
+@pytest.fixture
+def user(client, monkeypatch):
+    """A signed-in user with 1 credit, and platform keys for OpenAI"""
+    monkeypatch.setitem(main.PLATFORM_KEYS, "openai", "test-key")
+    with SessionLocal() as db:
+        user = User(username="test-credits", email="test-credits@example.com", model_credits_remaining=1)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    main.app.dependency_overrides[main.get_current_user_id] = lambda: user_id
+    yield user_id
+    main.app.dependency_overrides.pop(main.get_current_user_id, None)
+    credit_ledger.accounts.pop(user_id, None)
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+
+def test_request_body_cannot_name_the_billed_user(client, user, monkeypatch):
+    monkeypatch.setattr(main, "ALLOW_ANONYMOUS_PLATFORM_CREDITS", False)
+    main.app.dependency_overrides.pop(main.get_current_user_id)
+    body = {"model": "gpt-4o", "prompt": "Hi", "use_platform_credits": True, "user_id": user}
+    assert client.post("/api/run", json=body).status_code == 401
+    assert client.post("/api/run/stream", json=body).status_code == 401
+
+def test_runs_beyond_the_balance_get_402(client, user):
+    user_id = user
+    body = {"model": "gpt-4o", "prompt": "Hi", "use_platform_credits": True}
+    # Another run holds the user's only credit
+    reservation = client.portal.call(credit_ledger.reserve, user_id, 1)
+    try:
+        response = client.post("/api/run", json=body)
+        assert response.status_code == 402
+        assert response.json()["error_type"] == "insufficient_credits"
+    finally:
+        credit_ledger.release(reservation)
+
+def test_abandoned_stream_releases_its_reservation(client, user):
+    user_id = user
+    body = json.dumps({"model": "gpt-4o", "prompt": "Hi", "use_platform_credits": True}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/run/stream", "raw_path": b"/api/run/stream", "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000)
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        # The client goes away as soon as the request is read
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    client.portal.call(main.app, scope, receive, send)
+    account = credit_ledger.accounts[user_id]
+    assert account.reserved == 0 and account.pending == 0
+
+def test_placeholder_image_runs_reserve_nothing(client, user, monkeypatch):
+    placeholder = next(model for model, config in main.MODEL_CONFIGS.items()
+                       if config["type"] == "image" and config["provider"] not in main.IMAGE_ADAPTERS)
+    request = main.RunRequest(model=placeholder, prompt="Hi", use_platform_credits=True)
+    assert client.portal.call(main.reserve_credits, request, main.MODEL_CONFIGS[placeholder], user) is None
+
+    # A real image adapter is metered: 2 credits, more than the user has
+    request = main.RunRequest(model="dall-e-3", prompt="Hi", use_platform_credits=True)
+    with pytest.raises(InsufficientCredits):
+        client.portal.call(main.reserve_credits, request, main.MODEL_CONFIGS["dall-e-3"], user)
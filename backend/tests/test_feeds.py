@@ -0,0 +1,25 @@
+"""
+Keyset-paginated feeds
+"""
+
+import main
+
+from conftest import TEST_MODEL
+
+def test_feed_second_page_follows_the_cursor(client, prompts):
+    first = client.get(f"/api/prompts/by-model/{TEST_MODEL}?limit=2")
+    assert [prompt["id"] for prompt in first.json()] == prompts[:2]
+
+    second = client.get(f"/api/prompts/by-model/{TEST_MODEL}?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert second.status_code == 200
+    assert [prompt["id"] for prompt in second.json()] == prompts[2:]
+    assert "X-Next-Cursor" not in second.headers
+
+def test_naive_cursor_is_read_as_utc(client, prompts):
+    first = client.get(f"/api/prompts/by-model/{TEST_MODEL}?limit=2")
+    created_at = first.json()[-1]["created_at"]
+    # A cursor issued while prompts.created_at was TIMESTAMP WITHOUT TIME ZONE
+    naive = main.pack_cursor([created_at.replace("Z", "").split("+")[0], prompts[1]])
+    second = client.get(f"/api/prompts/by-model/{TEST_MODEL}?limit=2&cursor={naive}")
+    assert second.status_code == 200
+    assert [prompt["id"] for prompt in second.json()] == prompts[2:]
@@ -0,0 +1,40 @@
+"""
+Metric snapshots posted to /api/metrics/ingest reach the read endpoints
+"""
+
+import json
+import time
+from datetime import date
+
+import ingest
+from read_cache import read_cache
+
+SCRAPER = {"Authorization": "Bearer test-scraper-token", "Content-Type": "application/x-ndjson"}
+
+def test_ingest_requires_the_scraper_token(client, prompts, monkeypatch):
+    monkeypatch.setattr(ingest, "METRICS_INGEST_TOKEN", "test-scraper-token")
+    snapshot = {"prompt_id": prompts[0], "provider": "instagram", "metric_date": date.today().isoformat(), "views": 10**9}
+    for headers in ({}, {"Authorization": "Bearer wrong"}):
+        response = client.post("/api/metrics/ingest", content=json.dumps(snapshot) + "\n", headers=headers)
+        assert response.status_code == 401
+
+def test_ingested_metrics_invalidate_cached_detail(client, prompts, monkeypatch):
+    monkeypatch.setattr(ingest, "METRICS_INGEST_TOKEN", "test-scraper-token")
+    prompt_id = prompts[0]
+    assert client.get(f"/api/prompts/{prompt_id}").json()["metrics"]["views"] == 100
+    client.get("/api/models/catalog")
+
+    snapshot = {"prompt_id": prompt_id, "provider": "instagram", "metric_date": date.today().isoformat(), "views": 250}
+    response = client.post("/api/metrics/ingest", content=json.dumps(snapshot) + "\n", headers=SCRAPER)
+    assert response.json()["accepted"] == 1
+
+    # Flushed within METRICS_FLUSH_INTERVAL, well before the cached detail would expire
+    deadline = time.monotonic() + 5
+    while True:
+        views = client.get(f"/api/prompts/{prompt_id}").json()["metrics"]["views"]
+        if views == 250 or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+    assert views == 250
+    # Responses without metrics stay cached
+    assert read_cache.get(("models/catalog",)) is not None
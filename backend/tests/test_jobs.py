@@ -0,0 +1,57 @@
+"""
+Job workers survive failed status writes and always report how a job ended
+"""
+
+import asyncio
+
+from jobs import JobRunner
+
+def test_failed_status_writes_do_not_stop_workers(monkeypatch):
+    def failing_update(job_id, **fields):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(JobRunner, "_create", staticmethod(lambda *args: None))
+    monkeypatch.setattr(JobRunner, "_update", staticmethod(failing_update))
+
+    async def run():
+        runner = JobRunner(workers=1, queue_size=10)
+        await runner.start()
+        finished = []
+
+        async def ok():
+            return {"image_url": "x"}
+
+        async def fails():
+            raise RuntimeError("provider error")
+
+        for work in (ok, fails, ok):
+            await runner.submit("model", "image", "prompt", work, on_finish=finished.append)
+        await runner.queue.join()
+        alive = not runner.tasks[0].done()
+        stats = runner.get_stats()
+        await runner.stop()
+        return finished, alive, stats
+
+    finished, alive, stats = asyncio.run(run())
+    assert finished == [True, False, True]
+    assert alive
+    assert stats["pending"] == 0 and stats["status_errors"] == 6
+
+def test_queued_jobs_finish_as_failed_on_shutdown(monkeypatch):
+    monkeypatch.setattr(JobRunner, "_create", staticmethod(lambda *args: None))
+    monkeypatch.setattr(JobRunner, "_update", staticmethod(lambda job_id, **fields: None))
+
+    async def run():
+        runner = JobRunner(workers=1, queue_size=10)
+        await runner.start()
+        finished = []
+
+        async def slow():
+            await asyncio.sleep(60)
+
+        for _ in range(2):
+            await runner.submit("model", "video", "prompt", slow, on_finish=finished.append)
+        await asyncio.sleep(0.05)
+        await runner.stop()
+        return finished
+
+    assert asyncio.run(run()) == [False, False]
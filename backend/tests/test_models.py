@@ -0,0 +1,31 @@
+"""
+Model list and catalog built from the model_catalog table
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete
+
+from database import SessionLocal, Prompt
+from read_cache import read_cache
+
+def test_display_names_sharing_a_config_each_keep_their_entry(client):
+    ids = ["test-veo-dash", "test-veo-space"]
+    with SessionLocal() as db:
+        for prompt_id, model in zip(ids, ["VEO-3", "Veo 3"]):
+            db.add(Prompt(id=prompt_id, title=model, prompt_text="text", model=model,
+                          output_type="video", created_at=datetime.utcnow()))
+        db.commit()
+    read_cache.clear()
+    try:
+        models = client.get("/api/models").json()
+        assert "VEO-3" in models and "Veo 3" in models
+        catalog = {entry["model"]: entry for entry in client.get("/api/models/catalog").json()}
+        for model in ("VEO-3", "Veo 3"):
+            assert catalog[model]["prompt_count"] == 1
+            assert catalog[model]["config_id"] == "veo-3"
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(Prompt).where(Prompt.id.in_(ids)))
+            db.commit()
+        read_cache.clear()
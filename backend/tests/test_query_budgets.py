@@ -0,0 +1,33 @@
+"""
+Query budgets for the read endpoints, so N+1 loading can't creep back in
+"""
+
+from database import assert_max_queries, async_engine
+from read_cache import read_cache
+
+from conftest import TEST_MODEL
+
+def get_uncached(client, url: str, max_queries: int):
+    read_cache.clear()
+    with assert_max_queries(max_queries, bind=async_engine):
+        response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+def test_feed_query_budget(client, prompts):
+    page = get_uncached(client, "/api/prompts?limit=100", 1).json()
+    assert prompts[0] in [prompt["id"] for prompt in page]
+
+def test_feed_by_model_query_budget(client, prompts):
+    page = get_uncached(client, f"/api/prompts/by-model/{TEST_MODEL}?limit=100", 1).json()
+    assert [prompt["id"] for prompt in page] == prompts
+    assert page[0]["metrics"]["views"] == 100
+
+def test_prompt_detail_query_budget(client, prompts):
+    detail = get_uncached(client, f"/api/prompts/{prompts[0]}", 1).json()
+    assert detail["prompt_text"] == "Prompt text 0"
+
+def test_cached_feed_runs_no_queries(client, prompts):
+    get_uncached(client, "/api/prompts?limit=100", 1)
+    with assert_max_queries(0, bind=async_engine):
+        client.get("/api/prompts?limit=100")
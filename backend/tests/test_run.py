@@ -0,0 +1,12 @@
+"""
+/api/run request handling that doesn't reach a provider
+"""
+
+def test_video_models_are_rejected_without_an_adapter(client):
+    response = client.post("/api/run", json={"model": "veo-3", "prompt": "A sunrise", "api_key": "key"})
+    assert response.status_code == 501
+
+def test_catalog_marks_video_models_not_runnable(client):
+    catalog = {entry["config_id"]: entry for entry in client.get("/api/models/catalog").json()}
+    assert catalog["veo-3"]["runnable"] is False
+    assert catalog["gpt-4o"]["runnable"] is True
@@ -0,0 +1,141 @@
+"""
+Trending ranking: time-decayed metric velocity, precomputed on a schedule into sorted in-memory lists
+"""
+
+import asyncio
+import bisect
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal, select
+
+from database import AsyncSessionLocal, Prompt, PromptMetric
+
+TRENDING_REFRESH_INTERVAL = float(os.getenv("TRENDING_REFRESH_INTERVAL", "300"))
+# Days of snapshots that count towards the score, and how fast older growth fades
+TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", "7"))
+TRENDING_HALF_LIFE_DAYS = float(os.getenv("TRENDING_HALF_LIFE_DAYS", "2"))
+
+# Growth in each metric is weighted by how strong a signal it is
+TRENDING_WEIGHTS = {"views": 1.0, "likes": 5.0, "shares": 10.0}
+
+# A ranking is a list of (-score, prompt_id), so ascending order is best first
+Ranking = List[Tuple[float, str]]
+
+def score_query(window_days: int = TRENDING_WINDOW_DAYS, half_life_days: float = TRENDING_HALF_LIFE_DAYS):
+    """Score every prompt with growth in the window, in a single pass over prompt_metrics
+
+    Snapshots are cumulative per provider, so growth on a day is the change
+    from that provider's previous snapshot. Each day's growth is weighted by
+    0.5 ** (age / half_life), with age measured from the newest snapshot date
+    so that a stale import still produces a ranking.
+    """
+    as_of = select(func.max(PromptMetric.metric_date)).scalar_subquery()
+    window = {
+        "partition_by": (PromptMetric.prompt_id, PromptMetric.provider),
+        "order_by": PromptMetric.metric_date
+    }
+    growth = select(
+        PromptMetric.prompt_id,
+        (as_of - PromptMetric.metric_date).label("age"),
+        *[
+            (getattr(PromptMetric, field) - func.lag(getattr(PromptMetric, field)).over(**window)).label(field)
+            for field in TRENDING_WEIGHTS
+        ]
+    ).where(
+        # One extra day so the first day in the window has a previous snapshot
+        PromptMetric.metric_date >= as_of - (window_days + 1)
+    ).subquery()
+
+    velocity = sum(
+        func.greatest(func.coalesce(growth.c[field], 0), 0) * weight
+        for field, weight in TRENDING_WEIGHTS.items()
+    )
+    score = func.sum(velocity * func.power(literal(0.5), growth.c.age / literal(half_life_days)))
+
+    return select(
+        Prompt.id, Prompt.model, Prompt.output_type, score.label("score")
+    ).join(
+        growth, growth.c.prompt_id == Prompt.id
+    ).where(
+        growth.c.age < window_days
+    ).group_by(Prompt.id).having(score > 0)
+
+class TrendingRanker:
+    """Holds the latest trending rankings and refreshes them in the background
+
+    Rankings are kept for every prompt and per model, output type and
+    model + output type, so any filtered page is a slice of one sorted list.
+    """
+
+    def __init__(self, interval: float = TRENDING_REFRESH_INTERVAL):
+        self.interval = interval
+        self.rankings: Dict[Tuple[Optional[str], Optional[str]], Ranking] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.refresh_seconds: Optional[float] = None
+        self.refreshes = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the previous ranking
+                self.last_error = str(e)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Recompute every score and swap in the new rankings"""
+        start = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(score_query())).all()
+
+        rankings: Dict[Tuple[Optional[str], Optional[str]], Ranking] = {}
+        for prompt_id, model, output_type, score in rows:
+            entry = (-float(score), prompt_id)
+            for key in ((None, None), (model, None), (None, output_type), (model, output_type)):
+                rankings.setdefault(key, []).append(entry)
+        for ranking in rankings.values():
+            ranking.sort()
+
+        self.rankings = rankings
+        self.refreshed_at = datetime.utcnow()
+        self.refresh_seconds = time.monotonic() - start
+        self.refreshes += 1
+        self.last_error = None
+
+    def page(self, limit: int, model: Optional[str] = None, output_type: Optional[str] = None,
+             after: Optional[Tuple[float, str]] = None) -> List[Tuple[str, float]]:
+        """Return up to limit (prompt_id, score) pairs, starting after the (score, id) position"""
+        ranking = self.rankings.get((model, output_type), [])
+        start = bisect.bisect_right(ranking, (-after[0], after[1])) if after else 0
+        return [(prompt_id, -negative_score) for negative_score, prompt_id in ranking[start:start + limit]]
+
+    def get_stats(self) -> dict:
+        return {
+            "ranked_prompts": len(self.rankings.get((None, None), [])),
+            "rankings": len(self.rankings),
+            "refresh_interval": self.interval,
+            "refreshes": self.refreshes,
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+            "refresh_seconds": self.refresh_seconds,
+            "last_error": self.last_error
+        }
+
+# App-wide ranker, started and stopped by the FastAPI lifespan in main.py
+trending = TrendingRanker()
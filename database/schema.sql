@@ -9,6 +9,15 @@ CREATE TABLE users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- weighted full-text search document: title (A) > tags (B) > prompt text (C)
+-- (wrapped as IMMUTABLE because array_to_string() is only STABLE)
+CREATE OR REPLACE FUNCTION prompt_search_document(title TEXT, prompt_text TEXT, tags TEXT[])
+RETURNS tsvector LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT setweight(to_tsvector('english', coalesce($1, '')), 'A')
+      || setweight(to_tsvector('english', coalesce(array_to_string($3, ' '), '')), 'B')
+      || setweight(to_tsvector('english', coalesce($2, '')), 'C')
+$$;
+
 -- core prompts
 CREATE TABLE prompts (
   id TEXT PRIMARY KEY,                     -- slug (stable ID)
@@ -21,7 +30,9 @@ CREATE TABLE prompts (
   attribution TEXT,                        -- "Instagram (@evolving.ai)"
   image_url TEXT,
   submitted_by INT REFERENCES users(id),   -- link to user who submitted
-  created_at TIMESTAMPTZ DEFAULT now()
+  created_at TIMESTAMPTZ DEFAULT now(),
+  version BIGINT NOT NULL DEFAULT 0,      -- content version for ETags (set_row_version trigger)
+  search_vector TSVECTOR GENERATED ALWAYS AS (prompt_search_document(title, prompt_text, tags)) STORED
 );
 
 -- soft analytics you can update in real time
@@ -34,10 +45,221 @@ CREATE TABLE prompt_metrics (
   shares BIGINT,
   comments BIGINT,
   PRIMARY KEY (prompt_id, provider, metric_date)
+) PARTITION BY RANGE (metric_date);
+
+-- monthly partitions are named prompt_metrics_YYYY_MM (see backend/partitions.py);
+-- rows outside every partition land in the default one and are moved out when their month's partition is created
+CREATE TABLE prompt_metrics_default PARTITION OF prompt_metrics DEFAULT;
+
+CREATE OR REPLACE FUNCTION create_prompt_metrics_partition(month_start DATE) RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+  partition_name TEXT := format('prompt_metrics_%s', to_char(month_start, 'YYYY_MM'));
+  month_end DATE := (date_trunc('month', month_start) + interval '1 month')::date;
+BEGIN
+  month_start := date_trunc('month', month_start)::date;
+  IF to_regclass(partition_name) IS NOT NULL THEN
+    RETURN;
+  END IF;
+  -- Move the month's rows out of the default partition through the parent,
+  -- so the rollup triggers see a delete and a re-insert
+  CREATE TEMP TABLE moved_metrics AS
+    SELECT * FROM prompt_metrics_default WHERE metric_date >= month_start AND metric_date < month_end;
+  DELETE FROM prompt_metrics WHERE metric_date >= month_start AND metric_date < month_end;
+  EXECUTE format('CREATE TABLE %I PARTITION OF prompt_metrics FOR VALUES FROM (%L) TO (%L)',
+                 partition_name, month_start, month_end);
+  INSERT INTO prompt_metrics SELECT * FROM moved_metrics;
+  DROP TABLE moved_metrics;
+END
+$$;
+
+-- the current month and the next two
+SELECT create_prompt_metrics_partition((date_trunc('month', current_date) + make_interval(months => offset_months))::date)
+FROM generate_series(0, 2) AS offset_months;
+
+-- per-prompt lifetime totals and newest daily snapshot, maintained on every write to prompt_metrics
+-- (totals are kept when old partitions are detached or dropped)
+CREATE TABLE prompt_metric_rollups (
+  prompt_id TEXT PRIMARY KEY REFERENCES prompts(id) ON DELETE CASCADE,
+  views BIGINT NOT NULL DEFAULT 0,
+  likes BIGINT NOT NULL DEFAULT 0,
+  shares BIGINT NOT NULL DEFAULT 0,
+  comments BIGINT NOT NULL DEFAULT 0,
+  latest_metric_date DATE,
+  latest_views BIGINT,
+  latest_likes BIGINT,
+  latest_shares BIGINT,
+  latest_comments BIGINT,
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  version BIGINT NOT NULL DEFAULT 0       -- content version for ETags (set_row_version trigger)
+);
+
+CREATE OR REPLACE FUNCTION refresh_prompt_metric_latest(p_prompt_id TEXT) RETURNS void LANGUAGE sql AS $$
+  UPDATE prompt_metric_rollups SET
+    (latest_metric_date, latest_views, latest_likes, latest_shares, latest_comments) = (
+      SELECT metric_date, sum(views), sum(likes), sum(shares), sum(comments)
+      FROM prompt_metrics
+      WHERE prompt_id = p_prompt_id
+        AND metric_date = (SELECT max(metric_date) FROM prompt_metrics WHERE prompt_id = p_prompt_id)
+      GROUP BY metric_date
+    )
+  WHERE prompt_id = p_prompt_id
+$$;
+
+CREATE OR REPLACE FUNCTION prompt_metric_rollup_on_change() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  latest DATE;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE prompt_metric_rollups SET
+      views = views - coalesce(OLD.views, 0),
+      likes = likes - coalesce(OLD.likes, 0),
+      shares = shares - coalesce(OLD.shares, 0),
+      comments = comments - coalesce(OLD.comments, 0),
+      updated_at = now()
+    WHERE prompt_id = OLD.prompt_id
+    RETURNING latest_metric_date INTO latest;
+    -- The snapshot left the newest day
+    IF OLD.metric_date >= latest AND (TG_OP = 'DELETE' OR NEW.prompt_id <> OLD.prompt_id
+                                      OR NEW.metric_date <> OLD.metric_date) THEN
+      PERFORM refresh_prompt_metric_latest(OLD.prompt_id);
+    END IF;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO prompt_metric_rollups AS rollup (prompt_id, views, likes, shares, comments, updated_at)
+    VALUES (NEW.prompt_id, coalesce(NEW.views, 0), coalesce(NEW.likes, 0),
+            coalesce(NEW.shares, 0), coalesce(NEW.comments, 0), now())
+    ON CONFLICT (prompt_id) DO UPDATE SET
+      views = rollup.views + EXCLUDED.views,
+      likes = rollup.likes + EXCLUDED.likes,
+      shares = rollup.shares + EXCLUDED.shares,
+      comments = rollup.comments + EXCLUDED.comments,
+      updated_at = now()
+    RETURNING latest_metric_date INTO latest;
+    IF latest IS NULL OR NEW.metric_date > latest THEN
+      -- A new newest day starts with just this snapshot
+      UPDATE prompt_metric_rollups SET
+        latest_metric_date = NEW.metric_date,
+        latest_views = NEW.views,
+        latest_likes = NEW.likes,
+        latest_shares = NEW.shares,
+        latest_comments = NEW.comments
+      WHERE prompt_id = NEW.prompt_id;
+    ELSIF NEW.metric_date = latest THEN
+      PERFORM refresh_prompt_metric_latest(NEW.prompt_id);
+    END IF;
+  END IF;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION prompt_metric_rollup_on_truncate() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  DELETE FROM prompt_metric_rollups;
+  RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER prompt_metrics_rollup AFTER INSERT OR UPDATE OR DELETE ON prompt_metrics
+FOR EACH ROW EXECUTE FUNCTION prompt_metric_rollup_on_change();
+
+CREATE TRIGGER prompt_metrics_rollup_truncate AFTER TRUNCATE ON prompt_metrics
+FOR EACH STATEMENT EXECUTE FUNCTION prompt_metric_rollup_on_truncate();
+
+-- per (model, output_type) prompt counts for /api/models, maintained on every write to prompts
+CREATE TABLE model_catalog (
+  model TEXT NOT NULL,
+  output_type TEXT NOT NULL,               -- '' for prompts without an output type
+  prompt_count INT NOT NULL DEFAULT 0,
+  latest_created_at TIMESTAMPTZ,
+  PRIMARY KEY (model, output_type)
+);
+
+CREATE OR REPLACE FUNCTION model_catalog_on_prompt_change() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND NEW.model = OLD.model
+     AND NEW.output_type IS NOT DISTINCT FROM OLD.output_type
+     AND NEW.created_at IS NOT DISTINCT FROM OLD.created_at THEN
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE model_catalog SET
+      prompt_count = prompt_count - 1,
+      latest_created_at = CASE
+        WHEN latest_created_at IS DISTINCT FROM OLD.created_at THEN latest_created_at
+        ELSE (SELECT max(created_at) FROM prompts
+              WHERE model = OLD.model AND output_type IS NOT DISTINCT FROM OLD.output_type AND id <> OLD.id)
+      END
+    WHERE model = OLD.model AND output_type = coalesce(OLD.output_type, '');
+    DELETE FROM model_catalog
+    WHERE model = OLD.model AND output_type = coalesce(OLD.output_type, '') AND prompt_count <= 0;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO model_catalog AS catalog (model, output_type, prompt_count, latest_created_at)
+    VALUES (NEW.model, coalesce(NEW.output_type, ''), 1, NEW.created_at)
+    ON CONFLICT (model, output_type) DO UPDATE SET
+      prompt_count = catalog.prompt_count + 1,
+      latest_created_at = greatest(catalog.latest_created_at, EXCLUDED.latest_created_at);
+  END IF;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION model_catalog_on_prompt_truncate() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  DELETE FROM model_catalog;
+  RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER prompts_model_catalog AFTER INSERT OR UPDATE OR DELETE ON prompts
+FOR EACH ROW EXECUTE FUNCTION model_catalog_on_prompt_change();
+CREATE TRIGGER prompts_model_catalog_truncate AFTER TRUNCATE ON prompts
+FOR EACH STATEMENT EXECUTE FUNCTION model_catalog_on_prompt_truncate();
+
+-- content versions for ETags: every insert or update of a prompt or rollup row takes the next value
+-- of one sequence, so versions never repeat and taking one needs no row lock
+CREATE SEQUENCE row_versions;
+
+CREATE OR REPLACE FUNCTION set_row_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  NEW.version := nextval('row_versions');
+  RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER prompts_row_version BEFORE INSERT OR UPDATE ON prompts
+FOR EACH ROW EXECUTE FUNCTION set_row_version();
+CREATE TRIGGER prompt_metric_rollups_row_version BEFORE INSERT OR UPDATE ON prompt_metric_rollups
+FOR EACH ROW EXECUTE FUNCTION set_row_version();
+
+-- async image/video generation jobs (see backend/jobs.py)
+CREATE TABLE jobs (
+  id TEXT PRIMARY KEY,                     -- uuid4 hex
+  model TEXT NOT NULL,
+  job_type TEXT NOT NULL,                  -- 'image' | 'video'
+  status TEXT NOT NULL DEFAULT 'submitted', -- 'submitted' | 'processing' | 'completed' | 'failed'
+  prompt TEXT,
+  result JSONB,
+  error TEXT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  started_at TIMESTAMP,
+  completed_at TIMESTAMP
 );
 
 -- helpful indexes
-CREATE INDEX idx_prompts_model ON prompts(model);
-CREATE INDEX idx_prompts_output_type ON prompts(output_type);
+-- keyset pagination: feeds are ordered by (created_at DESC, id DESC), one index per filter combination
+-- (the leading model / output_type columns also serve plain equality lookups)
+CREATE INDEX idx_prompts_created ON prompts(created_at DESC, id DESC);
+CREATE INDEX idx_prompts_model_created ON prompts(model, created_at DESC, id DESC);
+CREATE INDEX idx_prompts_output_type_created ON prompts(output_type, created_at DESC, id DESC);
+CREATE INDEX idx_prompts_model_output_type_created ON prompts(model, output_type, created_at DESC, id DESC);
+-- full-text search (/api/prompts/search)
+CREATE INDEX idx_prompts_search ON prompts USING GIN (search_vector);
+-- tag filters (tags && ... / tags @> ...) on /api/prompts and /api/prompts/facets
+CREATE INDEX idx_prompts_tags ON prompts USING GIN (tags);
 CREATE INDEX idx_prompts_submitted_by ON prompts(submitted_by);
-CREATE INDEX idx_metrics_prompt ON prompt_metrics(prompt_id);
+CREATE INDEX idx_metrics_prompt_date ON prompt_metrics(prompt_id, metric_date);   -- newest snapshot per prompt (rollup latest_*)
+CREATE INDEX idx_metrics_date ON prompt_metrics(metric_date);   -- trending refresh window (see backend/trending.py)